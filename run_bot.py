@@ -1,69 +1,166 @@
 # In run_bot.py (in the project root directory)
 
 import argparse
-from src.scraper.feature_scraper import FeatureScraper
-from src.scraper.feature_preprocess import FeaturePreprocessor
-from src.inference.model_inference import ModelInference
-from src.alpaca.alpaca_trader import AlpacaTrader
+import datetime
+import importlib
+import os
+import sys
+import time
+import traceback
 
-def main(args):
-    """
-    Main function to run the complete trading bot pipeline.
-    """
-    
-    ###################
-    # Initializations #
-    ###################
-    
-    feature_scraper         = FeatureScraper()
-    alpaca_trader           = AlpacaTrader()
-    feature_preprocessor    = FeaturePreprocessor()
-    model_inference         = ModelInference()
-    
-    ####################
-    # Get Current Data #
-    ####################
+from src.scraper.utils.checkpoint_helpers import StageCheckpoints, checkpoint_key, fingerprint_paths, hash_frame
 
-    print("\n--- Scraping and Preprocessing New Data ---")
-    current_features_df = feature_scraper.run(num_business_days=1, timepoint=args.timepoint, threshold_pct=args.threshold_pct)
-    if current_features_df is None or current_features_df.empty:
-        print("No new data scraped. Exiting.")
-        return
+# Stage classes are imported on first use, so every stage only pays for its own dependencies
+# (yfinance for scraping, lightgbm through joblib for inference, alpaca/gspread for trading)
+# and the scraper reaches its first request without loading the others.
+STAGES = {
+    "scraper": ("src.scraper.feature_scraper", "FeatureScraper"),
+    "preprocess": ("src.scraper.feature_preprocess", "FeaturePreprocessor"),
+    "inference": ("src.inference.model_inference", "ModelInference"),
+    "trader": ("src.alpaca.alpaca_trader", "AlpacaTrader"),
+}
 
-    current_features_df_preprocessed = feature_preprocessor.run(current_features_df, args.timepoint, args.threshold_pct)
+# {stage: (seconds, modules loaded)} of each stage's first import
+IMPORT_PROFILE = {}
+
+# Code and artifacts that the checkpointed stage outputs depend on
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRAPER_CODE = [os.path.join(ROOT_DIR, 'src', 'scraper')]
+INFERENCE_CODE = [os.path.join(ROOT_DIR, 'src', 'inference'), os.path.join(ROOT_DIR, 'src', 'scraper', 'utils', 'feature_schema_helpers.py')]
+MODELS_DIR = os.path.join(ROOT_DIR, 'data', 'models')
+
+def strategy_model_dir(timepoint, threshold_pct):
+    """Model artifact directory of a strategy (see the naming convention in the README)."""
+    return os.path.join(MODELS_DIR, f"LightGBM_alpha_{timepoint}_{threshold_pct}pct")
+
+def load_stage(name):
+    """Import a stage's module and return its class, recording the import time of the first load."""
+    module_name, class_name = STAGES[name]
+    start = time.perf_counter()
+    modules_before = len(sys.modules)
+    module = importlib.import_module(module_name)
+    IMPORT_PROFILE.setdefault(name, (time.perf_counter() - start, len(sys.modules) - modules_before))
+    return getattr(module, class_name)
+
+def print_import_profile():
+    """Summarize the import cost of every stage that was loaded."""
+    print("\n--- Import Profile ---")
+    for name, (seconds, modules) in IMPORT_PROFILE.items():
+        print(f"{name:<12}{seconds:>8.2f}s {modules:>6} modules")
+    print(f"{'total':<12}{sum(s for s, _ in IMPORT_PROFILE.values()):>8.2f}s {sum(m for _, m in IMPORT_PROFILE.values()):>6} modules")
+
+def parse_strategy(value):
+    """Parse a 'TIMEPOINT:THRESHOLD_PCT:ALLOCATION_PCT' strategy spec (e.g. '1w:5:5')."""
+    try:
+        timepoint, threshold_pct, allocation_pct = value.split(":")
+        return {"timepoint": timepoint, "threshold_pct": int(threshold_pct), "allocation_pct": float(allocation_pct)}
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid strategy '{value}', expected TIMEPOINT:THRESHOLD_PCT:ALLOCATION_PCT (e.g. '1w:5:5').")
+
+def run_strategy(strategy, current_features_df, checkpoints, code_version):
+    """Preprocess, score and trade one strategy on the shared scraped feature frame."""
+    from src.scraper.utils.feature_preprocess_helpers import FEATURE_MANIFEST_FILE
+    timepoint, threshold_pct = strategy["timepoint"], strategy["threshold_pct"]
+    # The preprocess stage writes the feature manifest into the model directory, so it must not invalidate the key
+    artifact_version = fingerprint_paths(strategy_model_dir(timepoint, threshold_pct), exclude=(FEATURE_MANIFEST_FILE,))
+
+    preprocess_key = checkpoint_key("preprocess", hash_frame(current_features_df), timepoint, threshold_pct, code_version, artifact_version)
+    current_features_df_preprocessed = checkpoints.run(
+        "preprocess", preprocess_key,
+        lambda: load_stage("preprocess")().run(current_features_df, timepoint, threshold_pct)
+    )
     if current_features_df_preprocessed is None or current_features_df_preprocessed.empty:
-        print("No data available after preprocessing. Exiting.")
+        print("No data available after preprocessing. Skipping strategy.")
         return
-        
+
     #################
     # Run Inference #
     #################
-    
-    print(f"\n--- Running Inference for Timepoint: {args.timepoint}, Threshold: {args.threshold_pct}% ---")
-    results_df = model_inference.run(current_features_df_preprocessed, args.timepoint, args.threshold_pct)
+
+    print(f"\n--- Running Inference for Timepoint: {timepoint}, Threshold: {threshold_pct}% ---")
+    inference_key = checkpoint_key("inference", hash_frame(current_features_df_preprocessed), timepoint, threshold_pct,
+                                   fingerprint_paths(*INFERENCE_CODE), artifact_version)
+    results_df = checkpoints.run(
+        "inference", inference_key,
+        lambda: load_stage("inference")().run(current_features_df_preprocessed, timepoint, threshold_pct)
+    )
 
     if results_df is None or results_df.empty:
-        print("Inference did not produce results. Exiting.")
+        print("Inference did not produce results. Skipping strategy.")
         return
-        
+
     ##################
     # Execute Trade #
     ##################
-    
+
     print("\n--- Executing Trades based on Inference Results ---")
+    alpaca_trader = load_stage("trader")()
     trade_config = {
-        "allocation_pct": args.allocation_pct,
-        "timepoint": args.timepoint,
-        "threshold_pct": args.threshold_pct
+        "allocation_pct": strategy["allocation_pct"],
+        "timepoint": timepoint,
+        "threshold_pct": threshold_pct
     }
-    
+
     print(f"Trade Execution Config: {trade_config}")
     alpaca_trader.run(trade_config, results_df)
 
+def main(args):
+    """
+    Main function to run the complete trading bot pipeline. New filings are scraped and
+    featurized once, then every strategy (timepoint, threshold_pct, allocation_pct) is
+    preprocessed, scored and traded on the same feature frame; a failing strategy does not
+    stop the others. The outputs of the scraper, preprocessing and inference stages are
+    checkpointed, so a same-day rerun after a failure (e.g. in trading) resumes from the first
+    stage whose inputs, config or code changed.
+    """
+    strategies = args.strategy
+    checkpoints = StageCheckpoints(enabled=not args.no_checkpoints)
+    code_version = fingerprint_paths(*SCRAPER_CODE)
+    strategy_pairs = [(strategy["timepoint"], strategy["threshold_pct"]) for strategy in strategies]
+
+    ####################
+    # Get Current Data #
+    ####################
+
+    print("\n--- Scraping New Data ---")
+    # The scrape covers the business days before today, so the date is part of its input
+    scraper_key = checkpoint_key("scraper", datetime.date.today().isoformat(), 1, args.incremental, sorted(strategy_pairs), code_version)
+    current_features_df = checkpoints.run(
+        "scraper", scraper_key,
+        lambda: load_stage("scraper")().run(num_business_days=1, incremental=args.incremental, strategies=strategy_pairs)
+    )
+    if current_features_df is None or current_features_df.empty:
+        print("No new data scraped. Exiting.")
+        return
+
+    failed = []
+    for strategy in strategies:
+        print(f"\n=== Strategy: {strategy['timepoint']} {strategy['threshold_pct']}% (allocation {strategy['allocation_pct']}%) ===")
+        try:
+            run_strategy(strategy, current_features_df, checkpoints, code_version)
+        except Exception:
+            traceback.print_exc()
+            failed.append(f"{strategy['timepoint']}-{strategy['threshold_pct']}%")
+    if failed:
+        raise RuntimeError(f"Strategies failed: {', '.join(failed)}")
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Run the trading bot with specific inference and trading parameters.")
-    parser.add_argument("--timepoint", type=str, required=True, help="The prediction timepoint (e.g., '1w', '1m').")
-    parser.add_argument("--threshold_pct", type=int, required=True, help="The threshold percentage (e.g., 5 for 5%%).")
-    parser.add_argument("--allocation_pct", type=float, required=True, help="The percentage of total portfolio equity to allocate to each trade (e.g., 2.0 for 2%%).")
+    parser.add_argument("--timepoint", type=str, help="The prediction timepoint (e.g., '1w', '1m').")
+    parser.add_argument("--threshold_pct", type=int, help="The threshold percentage (e.g., 5 for 5%%).")
+    parser.add_argument("--allocation_pct", type=float, help="The percentage of total portfolio equity to allocate to each trade (e.g., 2.0 for 2%%).")
+    parser.add_argument("--strategy", type=parse_strategy, action="append",
+                        help="Run a strategy given as TIMEPOINT:THRESHOLD_PCT:ALLOCATION_PCT (e.g. '1w:5:5'). Repeat it to score several strategies on one scrape; replaces the three options above.")
+    parser.add_argument("--incremental", action="store_true", help="Only process filings that are not in the local trade store yet.")
+    parser.add_argument("--no-checkpoints", action="store_true", help="Recompute every stage instead of restoring checkpointed outputs from an earlier run today.")
+    parser.add_argument("--profile-imports", action="store_true", help="Print the import time of every pipeline stage at exit.")
     args = parser.parse_args()
-    main(args)
+    if not args.strategy:
+        if args.timepoint is None or args.threshold_pct is None or args.allocation_pct is None:
+            parser.error("either --strategy or all of --timepoint, --threshold_pct and --allocation_pct are required")
+        args.strategy = [{"timepoint": args.timepoint, "threshold_pct": args.threshold_pct, "allocation_pct": args.allocation_pct}]
+    try:
+        main(args)
+    finally:
+        if args.profile_imports:
+            print_import_profile()
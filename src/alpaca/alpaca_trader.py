@@ -5,7 +5,6 @@ import time
 from datetime import timedelta
 import pandas as pd
 from dotenv import load_dotenv
-from alpaca_trade_api.rest import REST
 from src.alpaca.utils.alpaca_trader_helpers import (
     log_to_google_sheet,
     sell_matured_positions,
@@ -16,6 +15,7 @@ from src.alpaca.utils.alpaca_trader_helpers import (
 
 class AlpacaTrader:
     def __init__(self):
+        from alpaca_trade_api.rest import REST
         load_dotenv()
         self.client = REST(
             os.getenv("ALPACA_API_KEY"),
@@ -1,8 +1,5 @@
-from finvizfinance.quote import finvizfinance
-import gspread
 import json
 import os
-from google.oauth2.service_account import Credentials
 from datetime import datetime, timezone, timedelta
 from dotenv import load_dotenv
 import time
@@ -96,6 +93,7 @@ def get_fundamentals_and_prediction(ticker: str, results_df) -> str:
         except (ValueError, TypeError):
             return "NA"
 
+    from finvizfinance.quote import finvizfinance
     try:
         stock = finvizfinance(ticker)
         info = stock.ticker_fundament()
@@ -114,6 +112,9 @@ def get_fundamentals_and_prediction(ticker: str, results_df) -> str:
 
 def log_to_google_sheet(message: str, sheet_name: str):
     """Logs a message to a specific worksheet in the Google Sheet."""
+    # Sheets clients are imported on first use so importing this module stays cheap
+    import gspread
+    from google.oauth2.service_account import Credentials
     load_dotenv()
     scopes = [
         'https://www.googleapis.com/auth/spreadsheets',
@@ -284,6 +285,8 @@ def get_bot_bought_tickers(sheet_name: str) -> list[str]:
     it has bought.
     """
     print(f"Reading buy history from sheet: '{sheet_name}'...")
+    import gspread
+    from google.oauth2.service_account import Credentials
     load_dotenv()
     scopes = [
         'https://www.googleapis.com/auth/spreadsheets',
@@ -1,10 +1,12 @@
 import os
 import glob
-import joblib
 import pandas as pd
 import numpy as np
 import re
 
+from src.scraper.utils.feature_schema_helpers import apply_feature_schema
+from .utils.artifact_registry_helpers import get_strategy_artifacts
+
 class ModelInference:
     def __init__(self):
         """
@@ -25,7 +27,8 @@ class ModelInference:
     def _load_final_artifacts(self):
         """
         Loads all final artifacts (models, features, and optimal threshold) 
-        from a single, self-contained strategy directory.
+        from a single, self-contained strategy directory. Artifacts come from the shared
+        registry, so they are unpickled only once per process.
         """
         models = {}
         strategy_dir_name = f"{self.model_type}_{self.category}_{self.timepoint}_{self.threshold_pct}pct"
@@ -41,8 +44,9 @@ class ModelInference:
         if not os.path.exists(features_path) or not os.path.exists(threshold_path):
             raise FileNotFoundError(f"Required artifacts (features or threshold) not found in {model_dir}")
 
-        final_features = joblib.load(features_path)
-        optimal_threshold = joblib.load(threshold_path)
+        artifacts = get_strategy_artifacts(model_dir)
+        final_features = artifacts.load("final_features.joblib")
+        optimal_threshold = artifacts.load("optimal_threshold.joblib")
         
         print(f"- Loaded {len(final_features)} features and optimal threshold ({optimal_threshold:.4f}) from '{strategy_dir_name}'.")
 
@@ -58,12 +62,12 @@ class ModelInference:
 
         for f in clf_files:
             seed = int(re.search(r'seed(\d+)', f).group(1))
-            models[seed] = {'clf': joblib.load(f)}
+            models[seed] = {'clf': artifacts.load(os.path.relpath(f, model_dir))}
         
         for f in reg_files:
             seed = int(re.search(r'seed(\d+)', f).group(1))
             if seed in models:
-                models[seed]['reg'] = joblib.load(f)
+                models[seed]['reg'] = artifacts.load(os.path.relpath(f, model_dir))
 
         print(f"- Loaded {len(models)} final model pairs.")
         return models, final_features, optimal_threshold
@@ -80,6 +84,7 @@ class ModelInference:
         if inference_df is None or inference_df.empty:
             print("Inference data is empty. Nothing to predict.")
             return None
+        inference_df = apply_feature_schema(inference_df, engineered=True)
             
         # --- 2. Prepare inference data ---
         # The 'FeaturePreprocessor' should have already prepared the data.
@@ -104,6 +109,7 @@ class ModelInference:
             (output_df['Predicted_Return'] >= optimal_threshold)
         ).astype(int)
         
+        output_df = apply_feature_schema(output_df, engineered=True)
         print(f"\nInference complete. {output_df['Final_Signal'].sum()} 'buy' signals generated.\n")
         print(', '.join(output_df.columns))
 
@@ -0,0 +1,54 @@
+import os
+import threading
+from collections import OrderedDict
+import joblib
+
+# Process-wide registry of unpickled strategy artifacts (scaler, feature list, threshold, seed
+# models). FeaturePreprocessor and ModelInference load through it, so each artifact is unpickled
+# once per process and both stages get the same objects. A file is reloaded when its mtime or
+# size changes, and only the most recently used strategies are kept in memory.
+ARTIFACT_CACHE_SIZE = 4
+
+class StrategyArtifacts:
+    """Memoized artifacts of one strategy directory."""
+
+    def __init__(self, model_dir):
+        self.model_dir = model_dir
+        self._artifacts = {}
+        self._lock = threading.Lock()
+
+    def load(self, name):
+        """Return the unpickled artifact at `name` (relative to the strategy directory)."""
+        path = os.path.join(self.model_dir, name)
+        stat = os.stat(path)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            cached = self._artifacts.get(name)
+            if cached is None or cached[0] != stamp:
+                cached = (stamp, joblib.load(path))
+                self._artifacts[name] = cached
+            return cached[1]
+
+_REGISTRY = OrderedDict()
+_REGISTRY_LOCK = threading.Lock()
+
+def get_strategy_artifacts(model_dir):
+    """Return the shared artifact bundle of a strategy directory, evicting the least recently used one if needed."""
+    key = os.path.realpath(model_dir)
+    with _REGISTRY_LOCK:
+        bundle = _REGISTRY.get(key)
+        if bundle is None:
+            bundle = _REGISTRY[key] = StrategyArtifacts(key)
+        _REGISTRY.move_to_end(key)
+        while len(_REGISTRY) > ARTIFACT_CACHE_SIZE:
+            _REGISTRY.popitem(last=False)
+        return bundle
+
+def load_artifact(model_dir, name):
+    """Load one artifact of a strategy directory through the registry."""
+    return get_strategy_artifacts(model_dir).load(name)
+
+def clear_artifact_registry():
+    """Drop every cached artifact, e.g. after replacing a strategy's models in place."""
+    with _REGISTRY_LOCK:
+        _REGISTRY.clear()
@@ -3,17 +3,20 @@
 import os
 import pandas as pd
 
+from src.scraper.utils.dataset_io_helpers import load_dataset
+from src.scraper.utils.feature_schema_helpers import apply_feature_schema
+
 def load_inference_data(file_path: str) -> pd.DataFrame:
     """
-    Loads data for inference from a given Excel file path.
+    Loads data for inference from a Parquet, Feather or Excel file path.
     Converts 'Filing Date' to datetime format.
     """
     if not os.path.exists(file_path):
         raise FileNotFoundError(f"Inference data file not found at: {file_path}")
         
     try:
-        df = pd.read_excel(file_path)
-        # Ensure date formatting is handled correctly after loading
+        df = apply_feature_schema(load_dataset(file_path), engineered=True)
+        # Dates written by older Excel exports are strings; columnar files already hold datetimes
         df['Filing Date'] = pd.to_datetime(df['Filing Date'], dayfirst=True, errors='coerce')
         print(f"- Successfully loaded inference data from {os.path.basename(file_path)} ({len(df)} rows).")
         return df
@@ -2,10 +2,11 @@ import os
 import pandas as pd
 from datetime import timedelta
 import time
-import joblib
 
 # Import helper functions
 from .utils.feature_preprocess_helpers import *
+from .utils.feature_schema_helpers import apply_feature_schema
+from src.inference.utils.artifact_registry_helpers import get_strategy_artifacts
 
 class FeaturePreprocessor:
     def __init__(self):
@@ -30,9 +31,13 @@ class FeaturePreprocessor:
         # --- Placeholders for loaded artifacts ---
         self.final_scaler = None
         self.final_features = None
+        self.feature_manifest = None
 
     def _load_inference_artifacts(self):
-        """Loads the final scaler and feature list for a specific model strategy."""
+        """
+        Loads the final scaler, feature list and (if stored and still valid) feature-type manifest
+        for a specific model strategy (shared with ModelInference through the artifact registry).
+        """
         if not all([self.model_type, self.category, self.timepoint, self.threshold_pct is not None]):
             raise ValueError("For inference, model_type, category, timepoint, and threshold_pct must be provided during initialization.")
 
@@ -46,8 +51,30 @@ class FeaturePreprocessor:
             raise FileNotFoundError(f"Inference artifacts not found in '{strategy_path}'. Ensure the final model has been trained for this strategy.")
 
         print(f"- Loading inference artifacts from: {strategy_dir_name}")
-        self.final_scaler = joblib.load(scaler_path)
-        self.final_features = joblib.load(features_path)
+        artifacts = get_strategy_artifacts(strategy_path)
+        self.final_scaler = artifacts.load('final_scaler.joblib')
+        self.final_features = artifacts.load('final_features.joblib')
+
+        self.feature_manifest = None
+        if os.path.exists(os.path.join(strategy_path, FEATURE_MANIFEST_FILE)):
+            manifest = artifacts.load(FEATURE_MANIFEST_FILE)
+            if feature_manifest_matches(manifest, self.final_features, self.final_scaler):
+                self.feature_manifest = manifest
+
+    def _ensure_feature_manifest(self):
+        """Build the feature-type manifest if the strategy has none yet and store it when it comes from the scaler."""
+        if self.feature_manifest is not None:
+            return
+        self.feature_manifest = build_feature_manifest(self.final_features, self.final_scaler, self.data)
+        if self.feature_manifest['source'] != 'scaler':
+            print("- Scaler has no feature names; continuous features were identified from this batch.")
+            return
+        strategy_path = os.path.join(self.models_dir, f"{self.model_type}_{self.category}_{self.timepoint}_{self.threshold_pct}pct")
+        try:
+            save_feature_manifest(self.feature_manifest, strategy_path)
+            print(f"- Feature manifest stored in {os.path.basename(strategy_path)}.")
+        except OSError as e:
+            print(f"- Could not store the feature manifest: {e}")
 
     def prepare_data(self):
         self.data['Filing Date'] = pd.to_datetime(self.data['Filing Date'], dayfirst=True, errors='coerce')
@@ -67,7 +94,8 @@ class FeaturePreprocessor:
         start_time = time.time()
         print("\n### START ### Feature Preprocessing")
 
-        self.data = features_df.copy()
+        # Enforce the compact feature dtypes at the stage boundary (this also copies the input)
+        self.data = apply_feature_schema(features_df)
         
         self.timepoint = timepoint
         self.threshold_pct = threshold_pct
@@ -84,16 +112,18 @@ class FeaturePreprocessor:
         print(f"- Aligning data to the {len(self.final_features)} features used for training.")
         self.data = self.data.reindex(columns=self.final_features, fill_value=0)
 
-        # Identify continuous features from the final, aligned feature set
-        _, continuous_features_to_scale = identify_feature_types(self.data)
+        # The continuous/categorical split comes from the strategy's feature manifest
+        self._ensure_feature_manifest()
+        self.categorical_features = self.feature_manifest['categorical']
+        self.continuous_features = self.feature_manifest['continuous']
         
         # Apply the saved scaler to the continuous features
-        if continuous_features_to_scale:
-            print(f"- Applying final scaler to {len(continuous_features_to_scale)} continuous features.")
-            self.data[continuous_features_to_scale] = self.final_scaler.transform(self.data[continuous_features_to_scale])
+        if self.continuous_features:
+            print(f"- Applying final scaler to {len(self.continuous_features)} continuous features.")
+            self.data = scale_continuous_features(self.data, self.final_scaler, self.feature_manifest)
         
         # Re-attach Ticker/Date for output and return the processed DataFrame
-        features_cleaned = self.save_feature_data('', train=False)
+        features_cleaned = apply_feature_schema(self.save_feature_data('', train=False), engineered=True)
 
         elapsed_time = timedelta(seconds=int(time.time() - start_time))
         print(f"### END ### Feature Preprocess - time elapsed: {elapsed_time}")
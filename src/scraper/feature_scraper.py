@@ -1,54 +1,98 @@
 import os
 import time
-from tqdm import tqdm
-from multiprocessing import Pool, cpu_count
 import numpy as np
 from datetime import timedelta
 
 from .utils.feature_scraper_helpers import *
+from .utils.price_cache_helpers import *
 from .utils.technical_indicators_helpers import *
 from .utils.financial_ratios_helpers import *
-from src.alpaca.utils.alpaca_trader_helpers import log_to_google_sheet
+from .utils.return_matrix_helpers import *
+from .utils.trade_store_helpers import *
+from .utils.negative_cache_helpers import *
+from .utils.stage_graph_helpers import *
+from .utils.executor_helpers import *
+from .utils.dataset_io_helpers import *
+from .utils.feature_schema_helpers import *
+from .utils.feature_profile_helpers import *
 
 class FeatureScraper:
     def __init__(self):
         self.base_url = "http://openinsider.com/screener?"
         self.data = pd.DataFrame()
         self.train = False
-        self.sheet_name = ""
+        self.sheet_names = []
+        self.benchmark_data = None
+        self.return_matrix = None
+        self.raw_price_history = None
+        self.trade_store_path = TRADE_STORE_PATH
         
-    def process_web_page(self, date_range):
+    def screener_url(self, date_range, page=1):
         start_date, end_date = date_range
-        url = f"{self.base_url}pl=1&ph=&ll=&lh=&fd=-1&fdr={start_date.month}%2F{start_date.day}%2F{start_date.year}+-+{end_date.month}%2F{end_date.day}%2F{end_date.year}&td=0&tdr=&fdlyl=&fdlyh=&daysago=&xp=1&vl=10&vh=&ocl=&och=&sic1=-1&sicl=100&sich=9999&grp=0&nfl=&nfh=&nil=&nih=&nol=&noh=&v2l=&v2h=&oc2l=&oc2h=&sortcol=0&cnt=1000&page=1"
-        return fetch_and_parse(url)
+        return f"{self.base_url}pl=1&ph=&ll=&lh=&fd=-1&fdr={start_date.month}%2F{start_date.day}%2F{start_date.year}+-+{end_date.month}%2F{end_date.day}%2F{end_date.year}&td=0&tdr=&fdlyl=&fdlyh=&daysago=&xp=1&vl=10&vh=&ocl=&och=&sic1=-1&sicl=100&sich=9999&grp=0&nfl=&nfh=&nil=&nih=&nol=&noh=&v2l=&v2h=&oc2l=&oc2h=&sortcol=0&cnt={SCREENER_PAGE_SIZE}&page={page}"
+
+    def process_web_page(self, date_range):
+        return fetch_all_pages(lambda page: self.screener_url(date_range, page))
+
+    def fetch_spans(self, spans, incremental=False):
+        """
+        Load the insider rows of the given date spans into self.data. Spans already completed in
+        the local trade store are read from it; only the others are scraped and then upserted, and
+        self.data is always read back from the store so a first scrape and a rerun see the same rows.
+        With `incremental`, self.data holds only the filings (Ticker, Filing Date groups) that
+        received a row new to the store, each with all of its stored rows.
+        """
+        with trade_store(self.trade_store_path) as conn:
+            stored_spans = get_fetched_spans(conn, spans)
+            missing_spans = [span for span in spans if span not in stored_spans]
+            high_water_mark = get_high_water_mark(conn)
+            if high_water_mark is not None:
+                print(f"- Trade store complete up to {high_water_mark.date()}, {len(stored_spans)}/{len(spans)} spans cached")
+
+            data_frames = []
+            if missing_spans:
+                # build a single human-readable span for tqdm  
+                start, _ = missing_spans[0]
+                _, end = missing_spans[-1]
+                desc = (
+                    "- Scraping entries from openinsider.com "
+                    f"({start.date()} → {end.date()})"
+                )
+
+                # I/O bound: the shared thread pool and one keep-alive session instead of a process per CPU
+                data_frames = map_io(self.process_web_page, missing_spans, desc=desc)
+            scraped_spans = [span for span, df in zip(missing_spans, data_frames) if df is not None]
+            data_frames = [df for df in data_frames if df is not None]
+
+            scraped = pd.concat(data_frames, ignore_index=True) if data_frames else pd.DataFrame()
+            new_rows = upsert_trades(conn, scraped)
+            mark_spans_fetched(conn, scraped_spans)
+            print(f"- {len(new_rows)} new entries added to the trade store")
+
+            stored = load_trades(conn, stored_spans + scraped_spans)
+            if incremental:
+                stored = select_filing_groups(stored, new_rows)
 
-    def fetch_data_from_pages(self, num_business_days):
+        if stored.empty:
+            self.data = pd.DataFrame()
+        else:
+            self.data = stored
+            print(f"- {len(self.data)} total entries extracted!")
+
+    def fetch_data_from_pages(self, num_business_days, incremental=False):
+        # The Sheets logger (gspread, google-auth) is only imported when there is something to log
+        from src.alpaca.utils.alpaca_trader_helpers import log_to_google_sheet
         spans = get_date_spans(num_business_days)
         if not spans:
-            log_to_google_sheet("No trade on weekends", self.sheet_name)
+            for sheet_name in self.sheet_names:
+                log_to_google_sheet("No trade on weekends", sheet_name)
             return
 
-        # build a single human-readable span for tqdm  
-        start, _ = spans[0]
-        _, end = spans[-1]
-        desc = (
-            "- Scraping entries from openinsider.com "
-            f"({start.date()} → {end.date()})"
-        )
-
-        with Pool(cpu_count()) as pool:
-            data_frames = list(tqdm(
-                pool.imap(self.process_web_page, spans),
-                total=len(spans),
-                desc=desc
-            ))
-
-        if data_frames:
-            self.data = pd.concat(data_frames, ignore_index=True)
-            print(f"- {len(self.data)} total entries extracted!")
-        else:
+        self.fetch_spans(spans, incremental=incremental)
+        if self.data.empty:
             print(f"🚫 No trades were made today")
-            log_to_google_sheet(f"No trades were found today", self.sheet_name)
+            for sheet_name in self.sheet_names:
+                log_to_google_sheet(f"No trades were found today", sheet_name)
     
     def clean_table(self, drop_threshold=0.05):
         columns_of_interest = ["Filing Date", "Trade Date", "Ticker", "Title", "Price", "Qty", "Owned", "ΔOwn", "Value"]
@@ -85,34 +129,75 @@ class FeatureScraper:
 
 
         
-    def add_technical_indicators(self, drop_threshold=0.05):
-        rows = self.data.to_dict('records')
+    def load_benchmark_data(self):
+        """Fetch SPY, ^VIX and ^GSPC once for the union of the date windows every stage needs."""
+        if self.data.empty:
+            return
+        filing_dates = pd.to_datetime(self.data['Filing Date'])
+        start_date = min(get_history_start(filing_dates.min()),
+                         (filing_dates.min() - pd.tseries.offsets.BDay(RETURN_LOOKBACK_BDAYS)).normalize())
+        end_date = filing_dates.max() + pd.Timedelta(days=1)
+        print("- Fetching benchmark and market index data (SPY, VIX, GSPC)...")
+        self.benchmark_data = get_benchmark_history(start_date, end_date)
+
+    def load_price_history(self):
+        """
+        Fetch every ticker's return-window history in one batched pass and build the run's shared
+        stock-vs-SPY return matrix from it. The raw bars are kept in self.raw_price_history for
+        the financial-ratio stage, so every ticker is read from the price store only once.
+
+        Returns:
+            dict: {ticker: adjusted OHLCV DataFrame}
+        """
+        # One batched price fetch per ticker covers the indicator windows, the 52-week range and the 252-day beta lookback
+        return_windows = plan_return_windows(self.data)
+        print(f"- Fetching price history for {len(return_windows)} tickers...")
+        self.raw_price_history = get_price_windows(return_windows, auto_adjust=False)
+        history = {ticker: adjust_prices(bars) for ticker, bars in self.raw_price_history.items()}
         
-        # Apply technical indicators
-        with Pool(cpu_count()) as pool:
-            processed_rows = list(tqdm(pool.imap(process_ticker_technical_indicators, rows), total=len(rows), desc="- Scraping technical indicators"))
+        # Shared stock-vs-SPY return matrix for the alpha metrics here and the point-in-time beta later
+        benchmark_spy = self.benchmark_data.get('SPY') if self.benchmark_data else None
+        benchmark_close = benchmark_spy['Close'] if benchmark_spy is not None else pd.Series(dtype='float64')
+        self.return_matrix = build_return_matrix({ticker: prices['Close'] for ticker, prices in history.items()}, benchmark_close)
+        return history
+
+    def technical_indicator_frame(self, history, drop_threshold=0.05):
+        """Return the rows of self.data with technical and alpha indicators added and cleaned; self.data is left unchanged."""
+        # Slice every ticker's minimal indicator window in memory
+        windows = plan_price_windows(self.data, max_period=50)
+        prices = {ticker: slice_window(history[ticker], *windows[ticker]) for ticker in windows if ticker in history}
+        prices = {ticker: bars for ticker, bars in prices.items() if not bars.empty}
         
-        self.data = pd.DataFrame(filter(None, processed_rows))
+        # Apply technical indicators: one vectorized pass over all tickers, sampled at each filing
+        print(f"- Calculating technical indicators for {len(self.data)} entries...")
+        data = add_panel_indicators(self.data, prices, self.return_matrix, max_period=50).reset_index(drop=True)
         
         # Replace infinite values and drop rows with missing values
-        self.data.replace([np.inf, -np.inf], np.nan, inplace=True)
+        data.replace([np.inf, -np.inf], np.nan, inplace=True)
         
         # Clean the data by dropping columns with more than 5% missing values and then dropping rows with missing values
-        self.data = clean_data(self.data, drop_threshold)
+        return clean_data(data, drop_threshold)
 
+    def add_technical_indicators(self, drop_threshold=0.05):
+        if self.benchmark_data is None:
+            self.load_benchmark_data()
+        history = self.load_price_history()
+        self.data = self.technical_indicator_frame(history, drop_threshold)
 
-    def add_financial_ratios(self, drop_threshold=0.2):
+    def fetch_financial_ratios(self, return_matrix=None, hist_data=None):
         """
-        Fetches financial ratios and merges them using a robust strategy
-        to ensure the merge keys align correctly.
+        Fetch the financial ratios and regime indicators of every (Ticker, Filing Date) row of self.data.
+        `return_matrix` and the raw `hist_data` come from `load_price_history`; without them the stage fetches its own.
         """
-        if self.data.empty:
-            print("- Data is empty, skipping financial ratio processing.")
-            return
-
         print(f"[INFO] Fetching financial ratios for {len(self.data)} entries...")
-        ratios_df = batch_fetch_financial_data(self.data[['Ticker', 'Filing Date']])
+        return batch_fetch_financial_data(self.data[['Ticker', 'Filing Date']], benchmark_data=self.benchmark_data,
+                                          return_matrix=return_matrix, hist_data=hist_data)
 
+    def merge_financial_ratios(self, ratios_df, drop_threshold=0.2):
+        """
+        Merges fetched financial ratios using a robust strategy
+        to ensure the merge keys align correctly.
+        """
         if ratios_df.empty:
             print("- Could not fetch any financial ratios. Continuing without new data.")
             return
@@ -138,22 +223,51 @@ class FeatureScraper:
         self.data = clean_data(self.data, drop_threshold)
         print(f"[INFO] Financial ratio processing complete. DataFrame now has {len(self.data.columns)} columns.")
 
+    def add_financial_ratios(self, drop_threshold=0.2):
+        """Fetches financial ratios for the current rows and merges them into self.data."""
+        if self.data.empty:
+            print("- Data is empty, skipping financial ratio processing.")
+            return
+        self.merge_financial_ratios(self.fetch_financial_ratios(return_matrix=self.return_matrix, hist_data=self.raw_price_history), drop_threshold)
 
-        
-    def save_feature_distribution(self, output_file='feature_distribution.xlsx'):
-        # Define the quantiles and statistics to be calculated
-        quantiles = [0, 0.01, 0.05, 0.1, 0.25, 0.5, 0.75, 0.9, 0.95, 0.99, 1]
-        summary_df = pd.DataFrame()
+    def add_features(self, drop_threshold=1.0):
+        """
+        Add technical indicators and financial ratios to the cleaned filings as a stage graph.
 
-        for column in self.data.columns:
-            if pd.api.types.is_numeric_dtype(self.data[column]):
-                stats = self.data[column].quantile(quantiles).to_dict()
-                stats['mean'] = self.data[column].mean()
-                summary_df[column] = pd.Series(stats)
+        The price history and the shared return matrix are fetched once upstream; the indicator
+        pass then runs concurrently with the fundamentals fetch of the ratio stage, which reuses
+        the same raw bars and return matrix. Their outputs are joined on (Ticker, Filing Date)
+        afterwards. The result is the same as running `add_technical_indicators` and then
+        `add_financial_ratios`.
+        """
+        if self.data.empty:
+            return
+        stages = {
+            'benchmark': (self.load_benchmark_data, []),
+            'price_history': (lambda _: self.load_price_history(), ['benchmark']),
+            'technical_indicators': (lambda history: self.technical_indicator_frame(history, drop_threshold), ['price_history']),
+            'financial_ratios': (lambda _, __: self.fetch_financial_ratios(return_matrix=self.return_matrix, hist_data=self.raw_price_history),
+                                 ['benchmark', 'price_history']),
+        }
+        results = run_stage_graph(stages)
+        self.data = results['technical_indicators']
+        if self.data.empty:
+            print("- Data is empty, skipping financial ratio processing.")
+            return
+        self.merge_financial_ratios(results['financial_ratios'], drop_threshold)
 
-        # Transpose the DataFrame so that each row is a feature
-        summary_df = summary_df.T
-        summary_df.columns = ['min', '1%', '5%', '10%', '25%', '50%', '75%', '90%', '95%', '99%', 'max', 'mean']
+    def save_feature_distribution(self, output_file='feature_distribution.xlsx', profile=None):
+        """
+        Save the min/1%/.../99%/max/mean table of every numeric feature. The statistics come from
+        a streaming feature profile (of self.data unless `profile` is given, e.g. the merged
+        profile of a backfill), which is stored next to the table as `<name>.profile.json` so it
+        can serve as the reference for `compare_feature_distribution`. Quantiles are exact for
+        features with fewer than SKETCH_SIZE (k=200) values and approximate beyond that (rank
+        error of roughly 1.7/k), so the table can differ slightly from exact pandas quantiles.
+        """
+        if profile is None:
+            profile = FeatureProfile.from_frame(self.data)
+        summary_df = profile.summary()
 
         # Save the summary to an Excel file
         data_dir = os.path.join(os.path.dirname(__file__), '../../data')
@@ -161,45 +275,125 @@ class FeatureScraper:
         os.makedirs(os.path.dirname(output_file), exist_ok=True)
         
         summary_df.to_excel(output_file, sheet_name='Feature Distribution')
+        profile.save(f"{os.path.splitext(output_file)[0]}.profile.json")
         print(f"- Feature distribution summary saved to {output_file}.")
+
+    def compare_feature_distribution(self, reference_file='feature_distribution.profile.json', profile=None, top_n=10):
+        """
+        Compare the feature distribution of self.data (or `profile`) against a saved reference
+        profile, e.g. the one written at training time, and print the most drifted features.
+
+        Returns:
+            pd.DataFrame: PSI, KS distance and mean shift per feature (see `compare_profiles`).
+        """
+        data_dir = os.path.join(os.path.dirname(__file__), '../../data')
+        reference = FeatureProfile.load(os.path.join(data_dir, reference_file))
+        if profile is None:
+            profile = FeatureProfile.from_frame(self.data)
+        drift = compare_profiles(profile, reference)
+        print(f"- Feature drift against {reference_file} (top {top_n} by PSI):")
+        print(drift.head(top_n).to_string(float_format=lambda x: f"{x:.3f}"))
+        return drift
     
-    def save_to_excel(self, file_path='output.xlsx'):
-        """Save the self.data DataFrame to an Excel file."""
+    def save_data(self, file_path='output.parquet'):
+        """Save self.data under data/ as Parquet, Feather or Excel, depending on the file suffix."""
         data_dir = os.path.join(os.path.dirname(__file__), '../../data')
         file_path = os.path.join(data_dir, file_path)
-        os.makedirs(os.path.dirname(file_path), exist_ok=True)  # Create the data directory if it doesn't exist
         if not self.data.empty:
             try:
-                self.data.to_excel(file_path, index=False)
+                file_path = save_dataset(self.data, file_path)
                 print(f"- Data successfully saved to {file_path}.\n")
             except Exception as e:
-                print(f"- Failed to save data to Excel: {e}")
+                print(f"- Failed to save data to {file_path}: {e}")
         else:
             print("- No data to save.")
-            
-    def load_sheet(self, file_path='output.xlsx'):
+
+    def save_to_excel(self, file_path='output.xlsx'):
+        """Export the self.data DataFrame to an Excel file."""
+        self.save_data(file_path)
+
+    def load_data(self, file_path='output.parquet', columns=None):
+        """Load a dataset file from data/ into self.data, optionally only the given columns."""
         data_dir = os.path.join(os.path.dirname(__file__), '../../data')
         file_path = os.path.join(data_dir, file_path)
 
         if os.path.exists(file_path):
             try:
-                self.data = pd.read_excel(file_path)
-                time.sleep(1)
-                print(f"- Sheet successfully loaded from {file_path}.")
+                self.data = apply_feature_schema(load_dataset(file_path, columns=columns))
+                print(f"- Data successfully loaded from {file_path}.")
             except Exception as e:
-                print(f"- Failed to load sheet from {file_path}: {e}")
+                print(f"- Failed to load data from {file_path}: {e}")
         else:
             print(f"- File '{file_path}' does not exist.")
+
+    def load_sheet(self, file_path='output.xlsx'):
+        """Load an Excel sheet (or any dataset file) from data/ into self.data."""
+        self.load_data(file_path)
         
-    def run(self, num_business_days, timepoint, threshold_pct):
+    def backfill(self, start_date, end_date, chunk_business_days=20, output_dir=BACKFILL_DIR):
+        """
+        Build features for every filing between `start_date` and `end_date` in chunks of
+        `chunk_business_days`. Each finished chunk is written as its own Parquet partition and
+        recorded in a checkpoint manifest, so a killed backfill resumes with the first
+        unfinished chunk. Only one chunk is held in memory at a time.
+        """
+        start_time = time.time()
+        print(f"\n### START ### Feature Backfill ({pd.Timestamp(start_date).date()} → {pd.Timestamp(end_date).date()})")
+        manifest = load_backfill_manifest(output_dir)
+        bdays = pd.bdate_range(start=pd.Timestamp(start_date).normalize(), end=pd.Timestamp(end_date).normalize())
+        chunks = [bdays[i:i + chunk_business_days] for i in range(0, len(bdays), chunk_business_days)]
+
+        for chunk in chunks:
+            chunk_id = f"{chunk[0]:%Y%m%d}-{chunk[-1]:%Y%m%d}"
+            if chunk_id in manifest['chunks']:
+                print(f"- Chunk {chunk_id} already done, skipping")
+                continue
+
+            self.data, self.benchmark_data, self.return_matrix = pd.DataFrame(), None, None
+            self.fetch_spans(get_date_spans_between(chunk[0], chunk[-1]))
+            if not self.data.empty:
+                self.clean_table(drop_threshold=0.05)
+            self.add_features(drop_threshold=1.0)
+            self.data = apply_feature_schema(self.data)
+
+            partition = write_backfill_partition(self.data, output_dir, chunk_id)
+            profile = write_backfill_profile(self.data, output_dir, chunk_id)
+            manifest['chunks'][chunk_id] = {'rows': len(self.data), 'file': partition, 'profile': profile}
+            save_backfill_manifest(output_dir, manifest)
+            print(f"- Chunk {chunk_id} saved ({len(self.data)} rows)")
+
+        self.data = pd.DataFrame()
+        get_negative_cache().report()
+        elapsed_time = timedelta(seconds=int(time.time() - start_time))
+        print(f"### END ### Feature Backfill - time elapsed: {elapsed_time}")
+
+    def load_backfill(self, output_dir=BACKFILL_DIR, columns=None):
+        """Load every completed backfill partition into self.data, optionally only the given columns."""
+        self.data = apply_feature_schema(load_backfill_dataset(output_dir, columns=columns))
+        print(f"- {len(self.data)} backfilled entries loaded from {output_dir}.")
+        return self.data
+
+    def save_backfill_distribution(self, output_dir=BACKFILL_DIR, output_file='feature_distribution.xlsx'):
+        """Save the feature distribution of the whole backfill from its per-chunk profiles, without loading its rows."""
+        self.save_feature_distribution(output_file, profile=load_backfill_profile(output_dir))
+
+    def run(self, num_business_days, timepoint=None, threshold_pct=None, incremental=False, strategies=None):
+        """
+        Scrape and featurize the last `num_business_days` of filings. With `incremental`, only
+        filings that were not in the local trade store yet go through the indicator and ratio stages.
+        Status messages are logged to the sheet of every (timepoint, threshold_pct) pair in
+        `strategies`, which defaults to the single given strategy; the features do not depend on it.
+        """
         start_time = time.time()
         print("\n### START ### Feature Scraper")
-        self.sheet_name = f"{timepoint}-{threshold_pct}%"
-        self.fetch_data_from_pages(num_business_days)
+        strategies = strategies or [(timepoint, threshold_pct)]
+        self.sheet_names = [f"{tp}-{th}%" for tp, th in strategies]
+        self.fetch_data_from_pages(num_business_days, incremental=incremental)
         if self.data.empty: return pd.DataFrame()
         self.clean_table(drop_threshold=0.05)
-        self.add_technical_indicators(drop_threshold=1.0)
-        self.add_financial_ratios(drop_threshold=1.0)
+        self.add_features(drop_threshold=1.0)
+        self.data = apply_feature_schema(self.data)
+        get_negative_cache().report()
         elapsed_time = timedelta(seconds=int(time.time() - start_time))
         print(f"### END ### Feature Scraper - time elapsed: {elapsed_time}")
         return self.data
@@ -0,0 +1,97 @@
+import os
+import time
+import hashlib
+import datetime
+import pandas as pd
+
+from .dataset_io_helpers import save_dataset, load_dataset
+
+# Content-addressed checkpoints of the run_bot stage outputs. A stage's key hashes everything its
+# output depends on (its input frame, the strategy config, the source code and model artifacts it
+# runs), and every key includes the hash of the previous stage's output, so a rerun restores the
+# stages whose key is unchanged and recomputes from the first invalidated one onwards.
+CHECKPOINT_DIR = os.path.join(os.path.dirname(__file__), '../../../data/cache/checkpoints')
+CHECKPOINT_MAX_AGE_DAYS = 3
+# Bump to invalidate every existing checkpoint when the checkpoint format changes
+CHECKPOINT_VERSION = 1
+HASH_BLOCK_SIZE = 1 << 20
+
+def hash_frame(df):
+    """Hash the columns, dtypes and values of a DataFrame (the index is ignored)."""
+    digest = hashlib.sha256()
+    digest.update(repr([(str(col), str(dtype)) for col, dtype in df.dtypes.items()]).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+def fingerprint_paths(*paths, exclude=()):
+    """
+    Hash the contents of files and directory trees (source code, model artifacts), so edits
+    invalidate checkpoints while a fresh checkout or re-download of the same files does not.
+    Missing paths hash as missing; compiled Python caches and files named in `exclude` (e.g.
+    ones the pipeline itself writes into the tree) are skipped.
+    """
+    digest = hashlib.sha256()
+    for root in paths:
+        root = os.path.normpath(root)
+        if os.path.isfile(root):
+            files = [root]
+        else:
+            files = sorted(
+                os.path.join(dir_path, name)
+                for dir_path, dir_names, file_names in os.walk(root)
+                if '__pycache__' not in dir_path
+                for name in file_names
+                if name not in exclude
+            )
+        digest.update(f"{os.path.basename(root)}:{len(files)}".encode())
+        for path in files:
+            digest.update(os.path.relpath(path, os.path.dirname(root)).encode())
+            with open(path, 'rb') as f:
+                for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+                    digest.update(block)
+    return digest.hexdigest()
+
+def checkpoint_key(stage, *parts):
+    """Combine a stage name and the hashes/config values its output depends on into one key."""
+    digest = hashlib.sha256(f"{CHECKPOINT_VERSION}:{stage}".encode())
+    for part in parts:
+        digest.update(f"|{part}".encode())
+    return digest.hexdigest()
+
+class StageCheckpoints:
+    """Memoize DataFrame-valued pipeline stages on disk under their content-addressed key."""
+
+    def __init__(self, directory=CHECKPOINT_DIR, enabled=True, max_age_days=CHECKPOINT_MAX_AGE_DAYS):
+        self.directory = directory
+        self.enabled = enabled
+        if enabled:
+            self.prune(max_age_days)
+
+    def path(self, stage, key):
+        return os.path.join(self.directory, f"{stage}-{key[:32]}.parquet")
+
+    def run(self, stage, key, fn, *args, **kwargs):
+        """
+        Return the checkpointed output of `stage` for `key`, or call `fn(*args, **kwargs)` and
+        checkpoint its result. Empty or None results are returned but never checkpointed, so a
+        rerun tries the stage again.
+        """
+        path = self.path(stage, key)
+        if self.enabled and os.path.exists(path):
+            df = load_dataset(path)
+            print(f"- Stage '{stage}' restored from checkpoint {os.path.basename(path)} ({len(df)} rows).")
+            return df
+        result = fn(*args, **kwargs)
+        if self.enabled and result is not None and not result.empty:
+            save_dataset(result, path)
+        return result
+
+    def prune(self, max_age_days):
+        """Delete checkpoints older than `max_age_days`."""
+        if not os.path.isdir(self.directory):
+            return
+        cutoff = time.time() - datetime.timedelta(days=max_age_days).total_seconds()
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.endswith('.parquet') and os.path.getmtime(path) < cutoff:
+                os.remove(path)
@@ -0,0 +1,67 @@
+import os
+import threading
+import pandas as pd
+import pyarrow.parquet as pq
+import pyarrow.feather as feather
+
+# Dataset I/O for the pipeline's feature tables. Parquet (the default) and Feather keep dtypes,
+# read only the requested columns and are memory-mapped on load; Excel is an export format for
+# people and stays readable for files written by older versions of the pipeline.
+DEFAULT_DATASET_SUFFIX = '.parquet'
+DATASET_FORMATS = {
+    '.parquet': 'parquet',
+    '.feather': 'feather',
+    '.arrow': 'feather',
+    '.xlsx': 'excel',
+}
+
+def dataset_format(path):
+    """Return the format of a dataset file from its suffix ('parquet', 'feather' or 'excel')."""
+    suffix = os.path.splitext(path)[1].lower()
+    if suffix not in DATASET_FORMATS:
+        raise ValueError(f"Unsupported dataset file '{path}', expected one of {sorted(DATASET_FORMATS)}")
+    return DATASET_FORMATS[suffix]
+
+def save_dataset(df, path):
+    """
+    Atomically write a DataFrame in the format given by the file suffix; paths without a
+    suffix are written as Parquet. The index is not stored.
+
+    Returns:
+        str: The path that was written.
+    """
+    if not os.path.splitext(path)[1]:
+        path += DEFAULT_DATASET_SUFFIX
+    file_format = dataset_format(path)
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+
+    # The temp file keeps the real suffix so writers that dispatch on it still work
+    root, suffix = os.path.splitext(path)
+    tmp_path = f"{root}.{os.getpid()}.{threading.get_ident()}.tmp{suffix}"
+    df = df.reset_index(drop=True)
+    if file_format == 'parquet':
+        df.to_parquet(tmp_path, index=False)
+    elif file_format == 'feather':
+        df.to_feather(tmp_path)
+    else:
+        df.to_excel(tmp_path, index=False)
+    os.replace(tmp_path, path)
+    return path
+
+def load_dataset(path, columns=None):
+    """
+    Load a dataset file written by `save_dataset` (or an Excel sheet).
+
+    Args:
+        path (str): File path; the format is taken from its suffix.
+        columns (list): Only load these columns (projection happens on read for Parquet/Feather).
+
+    Returns:
+        pd.DataFrame
+    """
+    file_format = dataset_format(path)
+    if file_format == 'parquet':
+        return pq.read_table(path, columns=columns, memory_map=True).to_pandas()
+    if file_format == 'feather':
+        return feather.read_table(path, columns=columns, memory_map=True).to_pandas()
+    return pd.read_excel(path, usecols=columns)
@@ -0,0 +1,66 @@
+import atexit
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from tqdm import tqdm
+
+# One long-lived executor layer shared by every stage of a run, and the single place to tune the
+# scraper's concurrency. Each kind of task gets its own named pool, so a task never waits for a
+# task queued behind it in its own pool:
+#   'stage'    feature stages of `run_stage_graph`; they block on the two pools below
+#   'io'       network-bound tasks (screener pages, fundamentals), paced by the per-host rate limiters
+#   'download' the per-ticker Yahoo requests of one batched price download; they never wait on other tasks
+# All pools are thread pools. The CPU-bound work left in a run (the NumPy indicator panel and the
+# KLL feature profile) is vectorized, runs once per run or chunk and mostly releases the GIL, so a
+# process pool would only add pickling of the price panels and cold imports in every worker.
+IO_WORKERS = 8
+POOL_WORKERS = {
+    'stage': 4,
+    'io': IO_WORKERS,
+    'download': 8,
+}
+
+_executors = {}
+_executors_lock = threading.Lock()
+
+def get_executor(pool='io'):
+    """
+    Return the process-wide thread pool of a task kind (see POOL_WORKERS), creating it on first use.
+    Tasks running on a pool must not wait for other tasks of the same pool.
+    """
+    with _executors_lock:
+        if pool not in _executors:
+            _executors[pool] = ThreadPoolExecutor(max_workers=POOL_WORKERS[pool], thread_name_prefix=pool)
+        return _executors[pool]
+
+def get_io_executor():
+    """Return the shared I/O thread pool."""
+    return get_executor('io')
+
+def map_io(fn, *iterables, desc=None, pool='io'):
+    """
+    Run `fn` over the zipped `iterables` on one of the shared pools.
+
+    Args:
+        fn (callable): Task function, called as `fn(*args)` for every tuple of arguments.
+        desc (str): If given, a tqdm progress bar with this description tracks completed tasks.
+        pool (str): Pool name from POOL_WORKERS.
+
+    Returns:
+        list: The results in input order. The first task exception is re-raised.
+    """
+    executor = get_executor(pool)
+    futures = [executor.submit(fn, *args) for args in zip(*iterables)]
+    if desc is not None:
+        for _ in tqdm(as_completed(futures), total=len(futures), desc=desc):
+            pass
+    return [future.result() for future in futures]
+
+def shutdown_executors():
+    """Shut every shared pool down; a later `get_executor` call starts a new one."""
+    with _executors_lock:
+        executors = list(_executors.values())
+        _executors.clear()
+    for executor in executors:
+        executor.shutdown(wait=True)
+
+atexit.register(shutdown_executors)
@@ -1,19 +1,29 @@
 import os
+import warnings
+import joblib
+import numpy as np
 import pandas as pd
 
+from .dataset_io_helpers import save_dataset, load_dataset
+from .feature_schema_helpers import CONTINUOUS_DTYPE, apply_feature_schema
+
 # Helper functions for loading, saving, and identifying feature types
 
-def load_feature_data(file_path):
-    """Load the feature data from an Excel file and extract Ticker and Filing Date."""
+# Feature-type manifest stored next to a strategy's scaler: the continuous/categorical split of
+# its final features and the positions of the scaled columns, in the scaler's column order.
+FEATURE_MANIFEST_FILE = 'feature_manifest.joblib'
+
+def load_feature_data(file_path, columns=None):
+    """Load the feature data from a Parquet, Feather or Excel file under data/, optionally only the given columns."""
     data_dir = os.path.join(os.path.dirname(__file__), '../../../data')
     file_path = os.path.join(data_dir, file_path)
     if os.path.exists(file_path):
         try:
-            data = pd.read_excel(file_path)
-            print(f"- Sheet successfully loaded from {file_path}.")
+            data = apply_feature_schema(load_dataset(file_path, columns=columns))
+            print(f"- Data successfully loaded from {file_path}.")
             return data
         except Exception as e:
-            print(f"- Failed to load sheet from {file_path}: {e}")
+            print(f"- Failed to load data from {file_path}: {e}")
             return None
     else:
         print(f"- File '{file_path}' does not exist.")
@@ -21,26 +31,24 @@ def load_feature_data(file_path):
 
 def get_ticker_filing_dates(data):
     """Extract Ticker and Filing Date."""
-    ticker_filing_dates = data[['Ticker', 'Filing Date']].copy()
-    ticker_filing_dates['Filing Date'] = ticker_filing_dates['Filing Date'].dt.strftime('%d/%m/%Y %H:%M')
-    return ticker_filing_dates
+    return data[['Ticker', 'Filing Date']].copy()
 
 def save_feature_data(data, ticker_filing_dates, file_path, train):
-    """Save the processed feature data."""
+    """Save the processed feature data; the file format follows the suffix of `file_path` (Parquet by default)."""
     data_dir = os.path.join(os.path.dirname(__file__), '../../../data')
+    # Filing dates stay datetimes: the columnar formats keep the dtype, so no string round trip is needed
     ticker_filing_dates['Filing Date'] = pd.to_datetime(ticker_filing_dates['Filing Date'], dayfirst=True, errors='coerce')
     ticker_filing_dates.dropna(subset=['Filing Date'], inplace=True)
-    ticker_filing_dates['Filing Date'] = ticker_filing_dates['Filing Date'].dt.strftime('%d/%m/%Y %H:%M')
     final_data = pd.concat([ticker_filing_dates, data], axis=1)
 
     if train:
         file_path = os.path.join(data_dir, file_path)
         if not final_data.empty:
             try:
-                final_data.to_excel(file_path, index=False)
+                file_path = save_dataset(final_data, file_path)
                 print(f"- Data successfully saved to {file_path}.")
             except Exception as e:
-                print(f"- Failed to save data to Excel: {e}")
+                print(f"- Failed to save data to {file_path}: {e}")
         else:
             print("- No data to save.")
     return final_data
@@ -71,6 +79,68 @@ def identify_feature_types(df):
     
     return categorical_cols, continuous_cols
 
+def build_feature_manifest(final_features, scaler, df=None):
+    """
+    Build the feature-type manifest of a strategy. The continuous features are the columns the
+    scaler was fitted on (`feature_names_in_`); scalers fitted without column names fall back to
+    `identify_feature_types` on `df`, which depends on the batch and is therefore not stored.
+
+    Returns:
+        dict: 'features', 'continuous', 'categorical', 'continuous_positions' (column indices
+              of the continuous features within 'features') and 'source' ('scaler' or 'batch').
+    """
+    final_features = list(final_features)
+    scaler_features = getattr(scaler, 'feature_names_in_', None)
+    if scaler_features is not None:
+        continuous = [str(col) for col in scaler_features]
+        source = 'scaler'
+    else:
+        _, continuous = identify_feature_types(df.reindex(columns=final_features, fill_value=0))
+        source = 'batch'
+
+    positions = {col: i for i, col in enumerate(final_features)}
+    missing = [col for col in continuous if col not in positions]
+    if missing:
+        raise ValueError(f"Scaler features missing from the final feature list: {missing}")
+    continuous_set = set(continuous)
+    return {
+        'features': final_features,
+        'continuous': continuous,
+        'categorical': [col for col in final_features if col not in continuous_set],
+        'continuous_positions': np.array([positions[col] for col in continuous], dtype=np.intp),
+        'source': source,
+    }
+
+def feature_manifest_matches(manifest, final_features, scaler):
+    """Check that a stored manifest still describes the strategy's feature list and scaler."""
+    scaler_features = getattr(scaler, 'feature_names_in_', None)
+    return (manifest['features'] == list(final_features)
+            and (scaler_features is None or manifest['continuous'] == [str(col) for col in scaler_features]))
+
+def save_feature_manifest(manifest, strategy_path):
+    """Atomically store a feature-type manifest in a strategy directory."""
+    path = os.path.join(strategy_path, FEATURE_MANIFEST_FILE)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    joblib.dump(manifest, tmp_path)
+    os.replace(tmp_path, path)
+
+def scale_continuous_features(df, scaler, manifest):
+    """
+    Apply the scaler to the continuous features of a frame aligned to the manifest's feature
+    list, as one transform over the precomputed column positions.
+    """
+    positions = manifest['continuous_positions']
+    if len(positions) == 0:
+        return df
+    if list(df.columns) != manifest['features']:
+        raise ValueError("Data columns are not aligned to the feature manifest.")
+    values = df.to_numpy(dtype='float64')[:, positions]
+    with warnings.catch_warnings():
+        # The positions already follow the scaler's column order, so its name check is redundant
+        warnings.filterwarnings('ignore', message='X does not have valid feature names')
+        scaled = scaler.transform(values).astype(CONTINUOUS_DTYPE)
+    return df.assign(**dict(zip(manifest['continuous'], scaled.T)))
+
 def engineer_new_features(df: pd.DataFrame) -> pd.DataFrame:
     """
     Engineers new, more powerful features from the existing feature set.
@@ -108,8 +178,9 @@ def engineer_new_features(df: pd.DataFrame) -> pd.DataFrame:
     # Ratio of recent purchases to sales. High values indicate strong buying pressure.
     # df['Purchase_Sale_Ratio_Quarter'] = df['num_purchases_quarter'] / (df['num_sales_quarter'] + epsilon)
 
-    # Normalizes the transaction value by the company's market cap.
-    df['Value_to_MarketCap'] = df['Value'] / (df['Market_Cap'] + epsilon)
+    # Normalizes the transaction value by the company's market cap (in float64: the epsilon is
+    # below float32 resolution at market-cap magnitudes).
+    df['Value_to_MarketCap'] = df['Value'].astype('float64') / (df['Market_Cap'].astype('float64') + epsilon)
 
     # Captures "buying the dip" vs. "buying at new highs".
     df['Distance_from_52W_High'] = 1 - df['52_Week_High_Normalized']
@@ -0,0 +1,218 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+
+# Streaming feature profiles for the distribution report and drift checks. Every numeric column
+# keeps exact count/sum/sum of squares/min/max plus a KLL quantile sketch, which uses
+# O(k log(n/k)) memory, can be updated chunk by chunk and merged across chunks or workers, and
+# answers rank queries within roughly 1.7/k of the true rank.
+PROFILE_QUANTILES = [0, 0.01, 0.05, 0.1, 0.25, 0.5, 0.75, 0.9, 0.95, 0.99, 1]
+PROFILE_COLUMNS = ['min', '1%', '5%', '10%', '25%', '50%', '75%', '90%', '95%', '99%', 'max', 'mean']
+SKETCH_SIZE = 200
+# Reference quantiles that bound the bins of the population stability index
+DRIFT_BINS = np.linspace(0, 1, 11)
+
+class KLLSketch:
+    """
+    Mergeable KLL quantile sketch over float values (NaNs are ignored). Every compaction keeps
+    the even- or odd-offset items at random, so its rank errors cancel out in expectation; the
+    random stream is freshly seeded per sketch unless `seed` is given (e.g. in tests), since a
+    shared fixed seed makes every column and chunk sketch pick the same offsets.
+    """
+
+    def __init__(self, k=SKETCH_SIZE, seed=None):
+        self.k = k
+        self.n = 0
+        self.compactors = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level):
+        depth = len(self.compactors) - level - 1
+        return max(int(np.ceil(self.k * (2 / 3) ** depth)), 2)
+
+    def _compress(self):
+        level = 0
+        while level < len(self.compactors):
+            items = self.compactors[level]
+            if len(items) >= self._capacity(level):
+                if level + 1 == len(self.compactors):
+                    self.compactors.append(np.empty(0))
+                # Sort, then promote the items at a random offset (0 or 1) with doubled weight; an odd item stays behind
+                items = np.sort(items)
+                keep = items[:len(items) % 2]
+                pairs = items[len(items) % 2:]
+                promoted = pairs[self._rng.integers(2)::2]
+                self.compactors[level] = keep
+                self.compactors[level + 1] = np.concatenate([self.compactors[level + 1], promoted])
+            level += 1
+
+    def update(self, values):
+        values = np.asarray(values, dtype='float64').ravel()
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return
+        self.n += values.size
+        self.compactors[0] = np.concatenate([self.compactors[0], values])
+        self._compress()
+
+    def merge(self, other):
+        """Fold another sketch into this one."""
+        while len(self.compactors) < len(other.compactors):
+            self.compactors.append(np.empty(0))
+        for level, items in enumerate(other.compactors):
+            self.compactors[level] = np.concatenate([self.compactors[level], items])
+        self.n += other.n
+        self._compress()
+        return self
+
+    def _weighted_items(self):
+        items = np.concatenate(self.compactors)
+        weights = np.concatenate([np.full(len(c), 2.0 ** level) for level, c in enumerate(self.compactors)])
+        order = np.argsort(items, kind='stable')
+        return items[order], weights[order]
+
+    def quantiles(self, qs):
+        """Approximate quantiles; exact (with linear interpolation like pandas) until the first compaction."""
+        qs = np.asarray(qs, dtype='float64')
+        if self.n == 0:
+            return np.full(qs.shape, np.nan)
+        if len(self.compactors) == 1:
+            return np.quantile(self.compactors[0], qs)
+        items, weights = self._weighted_items()
+        cumulative = np.cumsum(weights)
+        index = np.searchsorted(cumulative, qs * cumulative[-1], side='left')
+        return items[np.clip(index, 0, len(items) - 1)]
+
+    def cdf(self, points):
+        """Approximate fraction of values <= each point."""
+        points = np.asarray(points, dtype='float64')
+        if self.n == 0:
+            return np.full(points.shape, np.nan)
+        items, weights = self._weighted_items()
+        cumulative = np.concatenate([[0.0], np.cumsum(weights)])
+        return cumulative[np.searchsorted(items, points, side='right')] / cumulative[-1]
+
+    def to_dict(self):
+        return {'k': self.k, 'n': self.n, 'compactors': [c.tolist() for c in self.compactors]}
+
+    @classmethod
+    def from_dict(cls, state):
+        sketch = cls(k=state['k'])
+        sketch.n = state['n']
+        sketch.compactors = [np.asarray(c, dtype='float64') for c in state['compactors']]
+        return sketch
+
+class FeatureProfile:
+    """Per-column summary statistics and quantile sketches of a feature table."""
+
+    def __init__(self, k=SKETCH_SIZE):
+        self.k = k
+        self.columns = {}
+
+    def _column(self, name):
+        if name not in self.columns:
+            self.columns[name] = {'count': 0, 'sum': 0.0, 'sum_sq': 0.0, 'min': np.inf, 'max': -np.inf,
+                                  'sketch': KLLSketch(self.k)}
+        return self.columns[name]
+
+    def update(self, df):
+        """Add the numeric columns of one chunk of rows to the profile."""
+        for name in df.columns:
+            series = df[name]
+            if not pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+                continue
+            values = series.to_numpy(dtype='float64', na_value=np.nan)
+            values = values[~np.isnan(values)]
+            stats = self._column(name)
+            if values.size:
+                stats['count'] += int(values.size)
+                stats['sum'] += float(values.sum())
+                stats['sum_sq'] += float(np.square(values).sum())
+                stats['min'] = min(stats['min'], float(values.min()))
+                stats['max'] = max(stats['max'], float(values.max()))
+                stats['sketch'].update(values)
+        return self
+
+    def merge(self, other):
+        """Fold another profile (e.g. of another chunk or worker) into this one."""
+        for name, theirs in other.columns.items():
+            ours = self._column(name)
+            ours['count'] += theirs['count']
+            ours['sum'] += theirs['sum']
+            ours['sum_sq'] += theirs['sum_sq']
+            ours['min'] = min(ours['min'], theirs['min'])
+            ours['max'] = max(ours['max'], theirs['max'])
+            ours['sketch'].merge(theirs['sketch'])
+        return self
+
+    @classmethod
+    def from_frame(cls, df, chunk_size=100_000, k=SKETCH_SIZE):
+        profile = cls(k=k)
+        for start in range(0, len(df), chunk_size):
+            profile.update(df.iloc[start:start + chunk_size])
+        return profile
+
+    def summary(self):
+        """Return the min/1%/.../99%/max/mean table, one row per feature."""
+        rows = {}
+        for name, stats in self.columns.items():
+            if stats['count'] == 0:
+                rows[name] = [np.nan] * len(PROFILE_COLUMNS)
+                continue
+            quantiles = stats['sketch'].quantiles(PROFILE_QUANTILES)
+            quantiles[0], quantiles[-1] = stats['min'], stats['max']
+            rows[name] = list(quantiles) + [stats['sum'] / stats['count']]
+        return pd.DataFrame.from_dict(rows, orient='index', columns=PROFILE_COLUMNS)
+
+    def save(self, path):
+        """Atomically write the profile as JSON."""
+        state = {'k': self.k, 'columns': {
+            name: {**{key: value for key, value in stats.items() if key != 'sketch'}, 'sketch': stats['sketch'].to_dict()}
+            for name, stats in self.columns.items()
+        }}
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        profile = cls(k=state['k'])
+        for name, stats in state['columns'].items():
+            profile.columns[name] = {**stats, 'sketch': KLLSketch.from_dict(stats['sketch'])}
+        return profile
+
+def compare_profiles(current, reference):
+    """
+    Compare a profile against a reference (e.g. training-time) profile.
+
+    Returns:
+        pd.DataFrame: Per shared feature the population stability index over the reference
+                      deciles ('psi'), the largest CDF gap at those points ('ks') and the mean
+                      shift in reference standard deviations ('mean_shift'), sorted by PSI.
+    """
+    rows = {}
+    for name in current.columns.keys() & reference.columns.keys():
+        cur, ref = current.columns[name], reference.columns[name]
+        if cur['count'] == 0 or ref['count'] == 0:
+            continue
+        edges = np.unique(ref['sketch'].quantiles(DRIFT_BINS[1:-1]))
+        ref_cdf = np.concatenate([[0.0], ref['sketch'].cdf(edges), [1.0]])
+        cur_cdf = np.concatenate([[0.0], cur['sketch'].cdf(edges), [1.0]])
+        ref_share = np.clip(np.diff(ref_cdf), 1e-4, None)
+        cur_share = np.clip(np.diff(cur_cdf), 1e-4, None)
+
+        ref_mean = ref['sum'] / ref['count']
+        ref_std = np.sqrt(max(ref['sum_sq'] / ref['count'] - ref_mean ** 2, 0.0))
+        cur_mean = cur['sum'] / cur['count']
+        rows[name] = {
+            'psi': float(np.sum((cur_share - ref_share) * np.log(cur_share / ref_share))),
+            'ks': float(np.max(np.abs(cur_cdf - ref_cdf))),
+            'mean_shift': (cur_mean - ref_mean) / ref_std if ref_std > 0 else np.nan,
+        }
+    drift = pd.DataFrame.from_dict(rows, orient='index', columns=['psi', 'ks', 'mean_shift'])
+    return drift.sort_values('psi', ascending=False)
@@ -0,0 +1,59 @@
+import pandas as pd
+
+# Declared dtypes of the feature frame that flows from FeatureScraper through FeaturePreprocessor
+# to ModelInference: continuous features are float32, 0/1 flags int8, counts int32 and the
+# identifiers categorical. The schema is applied to every stage's output and to feature data
+# loaded from disk; columns it does not know keep a compact dtype by kind.
+# Large-magnitude columns (dollar amounts, share counts, OBV) need more than float32's ~7
+# significant digits, and the engineered ratios built from them divide by tiny epsilons, so they
+# stay float64 until feature engineering is done (see `apply_feature_schema`).
+CATEGORICAL_COLUMNS = ['Ticker', 'Sector']
+FLAG_COLUMNS = ['CEO', 'CFO', 'COO', 'Dir', 'Pres', 'VP', 'TenPercent', 'SP500_Above_SMA50', 'SP500_Above_SMA200', 'Final_Signal']
+FLAG_PREFIXES = ('Sector_',)
+COUNT_COLUMNS = ['Number_of_Purchases', 'Days_Since_IPO']
+WIDE_COLUMNS = ['Value', 'Qty', 'Owned', 'Market_Cap', 'OBV', 'Operating_Cash_Flow', 'Investing_Cash_Flow',
+                'Financing_Cash_Flow', 'Free_Cash_Flow']
+
+CATEGORICAL_DTYPE = 'category'
+FLAG_DTYPE = 'int8'
+COUNT_DTYPE = 'int32'
+CONTINUOUS_DTYPE = 'float32'
+WIDE_DTYPE = 'float64'
+
+def _is_whole(series):
+    """
+    Integer dtypes hold neither missing nor fractional values, so flags and counts that are
+    incomplete or already scaled stay floating point.
+    """
+    if pd.api.types.is_integer_dtype(series) or pd.api.types.is_bool_dtype(series):
+        return True
+    values = series.to_numpy()
+    return not series.hasnans and bool((values == values.round()).all())
+
+def feature_dtype(column, series, engineered=False):
+    """Target dtype of one feature column, or None if the column is left as it is."""
+    if column in CATEGORICAL_COLUMNS:
+        return CATEGORICAL_DTYPE
+    if pd.api.types.is_datetime64_any_dtype(series) or not pd.api.types.is_numeric_dtype(series):
+        return None
+    # Non-string labels (e.g. positional columns of a scaled array) have no flag prefix
+    if column in FLAG_COLUMNS or (isinstance(column, str) and column.startswith(FLAG_PREFIXES)) or pd.api.types.is_bool_dtype(series):
+        return FLAG_DTYPE if _is_whole(series) else CONTINUOUS_DTYPE
+    if column in COUNT_COLUMNS:
+        return COUNT_DTYPE if _is_whole(series) else CONTINUOUS_DTYPE
+    if column in WIDE_COLUMNS and not engineered:
+        return WIDE_DTYPE
+    return CONTINUOUS_DTYPE
+
+def apply_feature_schema(df, engineered=False):
+    """
+    Return a copy of `df` with every column cast to its declared feature dtype. The
+    large-magnitude WIDE_COLUMNS are only downcast to float32 once `engineered` features
+    (the preprocessed and inference frames) no longer need their full precision.
+    """
+    conversions = {}
+    for column in df.columns:
+        dtype = feature_dtype(column, df[column], engineered)
+        if dtype is not None and df[column].dtype != dtype:
+            conversions[column] = dtype
+    return df.astype(conversions)
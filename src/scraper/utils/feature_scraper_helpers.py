@@ -1,11 +1,46 @@
 import pandas as pd
+import os
+import json
 import datetime
 from datetime import timedelta
+import threading
 import requests
-from bs4 import BeautifulSoup
-from io import StringIO
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import numpy as np
+import lxml.html
+import pyarrow.parquet as pq
 from pandas.tseries.offsets import BDay
 
+from .rate_limit_helpers import host_of, rate_limited_call
+from .executor_helpers import IO_WORKERS
+from .dataset_io_helpers import save_dataset, load_dataset
+from .feature_profile_helpers import FeatureProfile
+
+# openinsider screener paging: rows per page (the `cnt` URL parameter) and a hard stop
+SCREENER_PAGE_SIZE = 1000
+SCREENER_MAX_PAGES = 100
+REQUEST_TIMEOUT = 30
+
+# Characters stripped from each numeric screener column before conversion, and its target type
+NUMERIC_COLUMNS = {
+    'Price': (r'[$,]', float),
+    'Qty': (r',', int),
+    'Owned': (r',', int),
+    'Value': (r'[$,+]', float),
+    'ΔOwn': (r'[%+>]', float),
+}
+DATE_COLUMNS = ['Filing Date', 'Trade Date']
+# Insider roles flagged from the free-text Title column
+TITLE_FLAGS = ['CEO', 'CFO', 'COO', 'Dir', 'Pres', 'VP', '10%']
+
+# On-disk dataset written by FeatureScraper.backfill: one Parquet file per chunk plus a checkpoint manifest
+BACKFILL_DIR = os.path.join(os.path.dirname(__file__), '../../../data/backfill')
+BACKFILL_MANIFEST = '_manifest.json'
+
+_session = None
+_session_lock = threading.Lock()
+
 def get_date_spans(num_business_days: int):
     """
     Returns a list of (start_datetime, end_datetime) tuples for the
@@ -25,7 +60,17 @@ def get_date_spans(num_business_days: int):
 
     # collect the last `num_days` business days
     bdays = pd.bdate_range(end=last_bd, periods=num_business_days)
+    return spans_for_business_days(bdays)
+
+def get_date_spans_between(start_date, end_date):
+    """
+    Returns the (start_datetime, end_datetime) spans of every business day between
+    `start_date` and `end_date` (inclusive), with the same weekend handling as `get_date_spans`.
+    """
+    bdays = pd.bdate_range(start=pd.Timestamp(start_date).normalize(), end=pd.Timestamp(end_date).normalize())
+    return spans_for_business_days(bdays)
 
+def spans_for_business_days(bdays):
     spans = []
     for bd in bdays:
         # the “span” is from bd → (next business day minus 1 calendar day)
@@ -85,51 +130,154 @@ def get_next_market_open(dt):
         dt += pd.tseries.offsets.Hour()
         return dt.replace(minute=0, second=0, microsecond=0)
 
-def get_html(url):
-    response = requests.get(url)
+def get_session():
+    """
+    Return the process-wide HTTP session. It keeps connections alive across requests and
+    retries connection errors and 5xx responses with exponential backoff.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            # 429s are left to the per-host rate limiter, which slows every thread down
+            retry = Retry(total=5, backoff_factor=1, status_forcelist=[500, 502, 503, 504], allowed_methods=['GET'])
+            # One keep-alive connection per worker of the shared I/O pool
+            adapter = HTTPAdapter(pool_connections=IO_WORKERS, pool_maxsize=IO_WORKERS, max_retries=retry)
+            session = requests.Session()
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _session = session
+    return _session
+
+def _get(url):
+    response = get_session().get(url, timeout=REQUEST_TIMEOUT)
     response.raise_for_status()
-    return response.text
+    return response
+
+def get_html(url):
+    return rate_limited_call(host_of(url), _get, url).text
 
 def parse_table(html):
-    soup = BeautifulSoup(html, "html.parser")
-    table = soup.find("table", {"class": "tinytable"})
-    if not table:
+    """
+    Extract the openinsider `tinytable` in a single lxml pass.
+
+    Returns:
+        pd.DataFrame: One row per trade with typed date and numeric columns, or None if the
+                      page has no table.
+    """
+    tree = lxml.html.document_fromstring(html)
+    tables = tree.xpath('//table[contains(concat(" ", normalize-space(@class), " "), " tinytable ")]')
+    if not tables:
+        return None
+    table = tables[0]
+
+    header_rows = table.xpath('.//tr[th]')
+    if not header_rows:
         return None
-    df = pd.read_html(StringIO(str(table)))[0]
     # Clean up column names by replacing \xa0 with a regular space
-    df.columns = df.columns.str.replace('\xa0', ' ', regex=False)
+    columns = [th.text_content().replace('\xa0', ' ').strip() for th in header_rows[0].xpath('./th')]
+
+    records = []
+    for tr in table.xpath('.//tr[td]'):
+        cells = [td.text_content().replace('\xa0', ' ').strip() or None for td in tr.xpath('./td')]
+        if len(cells) == len(columns):
+            records.append(cells)
+
+    df = pd.DataFrame(records, columns=columns)
+    for col in DATE_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col], errors='coerce')
+    for col in NUMERIC_COLUMNS:
+        if col in df.columns:
+            df[col] = parse_numeric_column(df[col], col)
     return df
 
 def fetch_and_parse(url):
     html = get_html(url)
     return parse_table(html)
 
+def fetch_all_pages(url_for_page, page_size=SCREENER_PAGE_SIZE, max_pages=SCREENER_MAX_PAGES):
+    """
+    Follow a paginated screener until the table is exhausted.
+
+    Args:
+        url_for_page (callable): Maps a 1-based page number to its URL.
+        page_size (int): Rows per full page; a shorter page is the last one.
+
+    Returns:
+        pd.DataFrame: All pages concatenated, or None if the first page has no table.
+    """
+    pages = []
+    for page in range(1, max_pages + 1):
+        df = fetch_and_parse(url_for_page(page))
+        if df is None or df.empty:
+            break
+        pages.append(df)
+        if len(df) < page_size:
+            break
+    else:
+        print(f"- Stopped after {max_pages} pages, results may be truncated")
+    return pd.concat(pages, ignore_index=True) if pages else None
+
+def next_market_open(dates):
+    """
+    Vectorized `get_next_market_open` for a datetime Series: before 9:00 → 9:00 the same day,
+    from 17:00 → 9:00 the next business day, otherwise up to the next half or full hour.
+    """
+    time_of_day = dates - dates.dt.normalize()
+    minutes = dates.dt.minute
+    hour = dates.dt.floor('h')
+
+    rounded = hour + pd.to_timedelta(np.where((minutes > 0) & (minutes <= 30), 30, 60), unit='m')
+    rounded = rounded.mask(time_of_day < pd.Timedelta(hours=9), dates.dt.normalize() + pd.Timedelta(hours=9))
+    after_close = time_of_day >= pd.Timedelta(hours=17)
+    if after_close.any():
+        next_day = dates[after_close].dt.normalize() + BDay(1) + pd.Timedelta(hours=9)
+        rounded = rounded.mask(after_close, next_day)
+    return rounded
+
 def process_dates(df):
     # Convert date strings to datetime objects
-    df['Filing Date'] = pd.to_datetime(df['Filing Date']).apply(get_next_market_open)
+    df['Filing Date'] = next_market_open(pd.to_datetime(df['Filing Date']))
     df['Trade Date'] = pd.to_datetime(df['Trade Date'])
     
     # Calculate "Days Since Trade"
     df['Days Since Trade'] = (df['Filing Date'] - df['Trade Date']).dt.days
     return df
 
+def select_filing_groups(rows, new_rows):
+    """
+    Return the `rows` that fall into a (Ticker, Filing Date) group of `aggregate_group` containing
+    one of `new_rows`, so each such group is aggregated over all of its purchases, not just the new ones.
+    """
+    if rows.empty or new_rows.empty:
+        return pd.DataFrame()
+    def group_keys(df):
+        return pd.MultiIndex.from_arrays([df['Ticker'], next_market_open(pd.to_datetime(df['Filing Date']))])
+    return rows[group_keys(rows).isin(group_keys(new_rows))].reset_index(drop=True)
+
+def parse_numeric_column(values, column):
+    """Convert a screener column such as '+$1,234' or '>999%' to numbers; already numeric input is only cast."""
+    pattern, dtype = NUMERIC_COLUMNS[column]
+    if pd.api.types.is_numeric_dtype(values):
+        numbers = values
+    else:
+        strings = values.astype('string').str.replace(pattern, '', regex=True)
+        if column == 'ΔOwn':
+            strings = strings.str.replace('New', '999', regex=False)
+        numbers = pd.to_numeric(strings, errors='coerce')
+    if dtype is int and not numbers.isna().any():
+        return numbers.astype('int64')
+    return numbers.astype('float64')
+
 def clean_numeric_columns(df):
-    df['Price'] = df['Price'].replace({r'\$': '', r',': ''}, regex=True).astype(float)
-    df['Qty'] = df['Qty'].replace({r',': ''}, regex=True).astype(int)
-    df['Owned'] = df['Owned'].replace({r',': ''}, regex=True).astype(int)
-    df['Value'] = df['Value'].replace({r'\$': '', r',': '', r'\+': ''}, regex=True).astype(float)
-    df['ΔOwn'] = df['ΔOwn'].replace({r'%': '', r'\+': '', r'New': '999', r'>': ''}, regex=True).astype(float)
+    for col in NUMERIC_COLUMNS:
+        df[col] = parse_numeric_column(df[col], col)
     return df
 
 def parse_titles(df):
     df['Title'] = df['Title'].fillna('')
-    df['CEO'] = df['Title'].apply(lambda title: int('CEO' in title))
-    df['CFO'] = df['Title'].apply(lambda title: int('CFO' in title))
-    df['COO'] = df['Title'].apply(lambda title: int('COO' in title))
-    df['Dir'] = df['Title'].apply(lambda title: int('Dir' in title))
-    df['Pres'] = df['Title'].apply(lambda title: int('Pres' in title))
-    df['VP'] = df['Title'].apply(lambda title: int('VP' in title))
-    df['10%'] = df['Title'].apply(lambda title: int('10%' in title))
+    for flag in TITLE_FLAGS:
+        df[flag] = df['Title'].str.contains(flag, regex=False).astype(int)
     return df
 
 def aggregate_group(df):
@@ -148,4 +296,84 @@ def aggregate_group(df):
         Pres=('Pres', 'max'),
         VP=('VP', 'max'),
         TenPercent=('10%', 'max')).sort_values(by='Filing Date', ascending=False).reset_index()
-    return df
\ No newline at end of file
+    return df
+
+def load_backfill_manifest(output_dir):
+    """Return the backfill checkpoint manifest ({'chunks': {chunk_id: {'rows', 'file', 'profile'}}}), empty if none exists."""
+    path = os.path.join(output_dir, BACKFILL_MANIFEST)
+    if not os.path.exists(path):
+        return {'chunks': {}}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def save_backfill_manifest(output_dir, manifest):
+    """Atomically replace the backfill checkpoint manifest."""
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, BACKFILL_MANIFEST)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def write_backfill_partition(df, output_dir, chunk_id):
+    """Atomically write one backfill chunk; returns the partition file name, or None for an empty chunk."""
+    if df.empty:
+        return None
+    file_name = f"part-{chunk_id}.parquet"
+    save_dataset(df, os.path.join(output_dir, file_name))
+    return file_name
+
+def write_backfill_profile(df, output_dir, chunk_id):
+    """Write the feature profile of one backfill chunk; returns the profile file name, or None for an empty chunk."""
+    if df.empty:
+        return None
+    file_name = f"part-{chunk_id}.profile.json"
+    FeatureProfile.from_frame(df).save(os.path.join(output_dir, file_name))
+    return file_name
+
+def load_backfill_dataset(output_dir, columns=None):
+    """
+    Concatenate the partitions of every completed backfill chunk. Sector dummy columns that
+    only appear in some chunks are filled with 0 elsewhere. With `columns`, only those columns
+    are read from each partition.
+    """
+    manifest = load_backfill_manifest(output_dir)
+    files = [entry['file'] for _, entry in sorted(manifest['chunks'].items()) if entry['file']]
+    if not files:
+        return pd.DataFrame()
+    frames = []
+    for path in (os.path.join(output_dir, f) for f in files):
+        projection = None
+        if columns is not None:
+            # Sector dummies differ between chunks, so each partition is projected onto the columns it has
+            available = set(pq.read_schema(path).names)
+            projection = [col for col in columns if col in available]
+        frames.append(load_dataset(path, columns=projection))
+    df = pd.concat(frames, ignore_index=True)
+    sector_columns = [col for col in df.columns if col.startswith('Sector_')]
+    df[sector_columns] = df[sector_columns].fillna(0).astype(int)
+    return df
+
+def load_backfill_profile(output_dir):
+    """
+    Merge the feature profiles of every completed backfill chunk without loading the rows.
+    Chunks written before profiles existed are profiled from their partition, and Sector
+    dummy columns missing from a chunk count as 0 for its rows, like in `load_backfill_dataset`.
+    """
+    manifest = load_backfill_manifest(output_dir)
+    entries = [entry for _, entry in sorted(manifest['chunks'].items()) if entry['file']]
+    profile, chunk_columns = FeatureProfile(), []
+    for entry in entries:
+        if entry.get('profile'):
+            chunk_profile = FeatureProfile.load(os.path.join(output_dir, entry['profile']))
+        else:
+            chunk_profile = FeatureProfile.from_frame(load_dataset(os.path.join(output_dir, entry['file'])))
+        profile.merge(chunk_profile)
+        chunk_columns.append((entry['rows'], set(chunk_profile.columns)))
+
+    sector_columns = [col for col in profile.columns if col.startswith('Sector_')]
+    for rows, columns in chunk_columns:
+        missing = [col for col in sector_columns if col not in columns]
+        if missing:
+            profile.update(pd.DataFrame(0, index=range(rows), columns=missing))
+    return profile
@@ -1,8 +1,27 @@
 import yfinance as yf
 import pandas as pd
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from tqdm import tqdm
+
+from .price_cache_helpers import get_price_windows, get_benchmark_history
+from .return_matrix_helpers import build_return_matrix, sample_point_in_time_beta
+from .rate_limit_helpers import is_rate_limit_error
+from .fundamentals_cache_helpers import FUNDAMENTALS_TTL, STATEMENTS, get_fundamentals, is_confirmed_missing, pick_latest
+from .negative_cache_helpers import NO_FUNDAMENTALS, get_negative_cache
+from .executor_helpers import map_io
+
+# Lookback of every history-based feature of this stage: the 252-bar point-in-time beta,
+# the 52-week high/low and the S&P 500 200-day SMA regime flag, plus a holiday buffer
+FEATURE_LOOKBACKS = {
+    'beta': pd.tseries.offsets.BDay(252),
+    '52_week_range': pd.Timedelta(days=365),
+    'sp500_sma200': pd.tseries.offsets.BDay(200),
+}
+HISTORY_BUFFER = pd.tseries.offsets.BDay(20)
+
+def get_history_start(first_filing_date):
+    """First date of price history needed for the features of filings on or after `first_filing_date`."""
+    first_filing_date = pd.Timestamp(first_filing_date).normalize()
+    return min(first_filing_date - lookback for lookback in FEATURE_LOOKBACKS.values()) - HISTORY_BUFFER
 
 # This is a provided helper function, unchanged.
 def calculate_financial_ratios(data):
@@ -108,40 +127,44 @@ def calculate_point_in_time_beta(stock_prices: pd.Series, market_prices: pd.Seri
     beta = covariance / market_variance
     return beta
 
-import random
-
-def process_single_ticker(row, tk_objects, hist_data, market_data_spy):
+def process_single_ticker(row, tk_objects, hist_data, beta, fundamentals_ttl=FUNDAMENTALS_TTL):
     """
     Worker function with a retry mechanism to handle API rate limiting.
+    `beta` is the row's point-in-time beta, computed for all rows from the shared return matrix.
+    Fundamentals are read from the on-disk cache and refreshed after `fundamentals_ttl`.
+    Tickers without any info or statements are recorded in the negative cache once repeated
+    fetches confirmed it (a single empty fetch may have been throttled).
     """
     ticker = row['Ticker']
     filing_date = row['Filing Date']
+    negative_cache = get_negative_cache()
 
     # --- RETRY LOGIC PARAMETERS ---
+    # Backoff itself is handled by the shared Yahoo rate limiter, which pauses after a throttle
     max_retries = 3
-    base_delay = 5  # seconds
 
     for attempt in range(max_retries):
         try:
             # --- START of original logic ---
-            t_obj = tk_objects.tickers.get(ticker)
-            # Add a small, random delay to space out requests
-            time.sleep(random.uniform(0.1, 0.5))
-
-            t_info = t_obj.info if hasattr(t_obj, 'info') else {}
+            # Info and statements come from the local cache; the network is only hit when it is stale
+            fundamentals = get_fundamentals(ticker, tk_objects, ttl=fundamentals_ttl)
+            if fundamentals is None:
+                negative_cache.record_failure(ticker, NO_FUNDAMENTALS)
+                return None
+            if not fundamentals['info'] or all(
+                    fundamentals[key] is None or fundamentals[key].empty for key in STATEMENTS):
+                if is_confirmed_missing(fundamentals):
+                    negative_cache.record_failure(ticker, NO_FUNDAMENTALS)
+                return None
+            negative_cache.record_success(ticker, NO_FUNDAMENTALS)
+
+            t_info = fundamentals['info']
             if t_info:
 
-                # Helper to get the latest financial statement before the filing date.
-                def pick_latest(stmt_df):
-                    if stmt_df is None or stmt_df.empty: return None
-                    stmt_df.columns = pd.to_datetime(stmt_df.columns).tz_localize(None)
-                    valid_cols = stmt_df.columns[stmt_df.columns <= filing_date]
-                    return stmt_df.loc[:, valid_cols.max()] if not valid_cols.empty else None
-
-                # Get the point-in-time financial statements (your existing logic is correct)
-                balance_sheet = pick_latest(t_obj.balance_sheet)
-                cash_flow = pick_latest(t_obj.cashflow)
-                income_statement = pick_latest(t_obj.financials)
+                # Get the point-in-time financial statements (latest statement before the filing date)
+                balance_sheet = pick_latest(fundamentals['balance_sheet'], filing_date)
+                cash_flow = pick_latest(fundamentals['cashflow'], filing_date)
+                income_statement = pick_latest(fundamentals['financials'], filing_date)
                 if balance_sheet is None or income_statement is None: return None
 
                 stock_market_data = hist_data.get(ticker) # Renamed for clarity
@@ -164,17 +187,6 @@ def process_single_ticker(row, tk_objects, hist_data, market_data_spy):
                 market_cap = current_price * shares_outstanding
                 eps = income_statement.get('Diluted EPS')
 
-                # --- THE BETA CALCULATION IS NOW CORRECT ---
-                
-                # 1. Get the historical prices for the stock up to the filing date
-                stock_prices_historical = stock_market_data['Close'].loc[:filing_date]
-                
-                # 2. Get historical prices for the market index (SPY) up to the filing date
-                market_prices_historical = market_data_spy['Close'].loc[:filing_date]
-                
-                # 3. Calculate beta using both series
-                beta = calculate_point_in_time_beta(stock_prices_historical.squeeze(), market_prices_historical.squeeze())
-                
                 # The data payload is now fully point-in-time correct
                 data_payload = {
                     'balance_sheet': balance_sheet,
@@ -195,9 +207,9 @@ def process_single_ticker(row, tk_objects, hist_data, market_data_spy):
                     ratios['Ticker'] = ticker
                     ratios['Filing Date'] = filing_date
                     
-                    # Your existing IPO date logic is robust and can remain
+                    # Without firstTradeDateEpochUtc, fall back to the first bar of the ticker's full monthly history
                     ipo_timestamp_epoch = t_info.get('firstTradeDateEpochUtc')
-                    ipo_date = pd.to_datetime(ipo_timestamp_epoch, unit='s') if ipo_timestamp_epoch else stock_market_data['Close'].first_valid_index()
+                    ipo_date = pd.to_datetime(ipo_timestamp_epoch, unit='s') if ipo_timestamp_epoch else fundamentals.get('first_trade_date')
                     if pd.isna(ipo_date) or ipo_date.year < 1990: return None
                     
                     filing_date_naive = filing_date.normalize()
@@ -207,14 +219,10 @@ def process_single_ticker(row, tk_objects, hist_data, market_data_spy):
                     return ratios
 
         except Exception as exc:
-            error_message = str(exc)
-            # Check for specific rate-limiting text in the error
-            if "Too Many Requests" in error_message or "401" in error_message or "rate limited" in error_message:
+            # Rate-limit errors have already throttled the shared limiter; just try again
+            if is_rate_limit_error(exc):
                 if attempt < max_retries - 1:
-                    # Calculate wait time with exponential backoff and jitter
-                    wait_time = base_delay * (2 ** attempt) + random.uniform(0, 1)
-                    print(f"--> [RATE LIMIT] for {ticker}. Retrying in {wait_time:.2f} seconds... (Attempt {attempt + 1}/{max_retries})")
-                    time.sleep(wait_time)
+                    print(f"--> [RATE LIMIT] for {ticker}. Retrying... (Attempt {attempt + 1}/{max_retries})")
                     continue # Go to the next attempt in the loop
                 else:
                     # Final attempt failed
@@ -227,30 +235,51 @@ def process_single_ticker(row, tk_objects, hist_data, market_data_spy):
 
     return None
 
-def batch_fetch_financial_data(df, max_workers=4):
+def batch_fetch_financial_data(df, benchmark_data=None, return_matrix=None, hist_data=None, fundamentals_ttl=FUNDAMENTALS_TTL):
     """
     Processes each ticker to fetch company-specific data and then enriches the
     final output with pre-calculated, point-in-time market regime indicators.
+    `benchmark_data` ({symbol: DataFrame} for SPY, ^VIX and ^GSPC) is fetched here if not provided,
+    `hist_data` ({ticker: raw daily bars} reaching back to `get_history_start` of each ticker's
+    first filing) likewise, and `return_matrix` (see `build_return_matrix`) is built from the
+    adjusted closes if not provided.
+    Cached fundamentals older than `fundamentals_ttl` are refreshed; tickers that recently had
+    no fundamentals at all are skipped (see `negative_cache_helpers`).
     """
     df_copy = df.copy()
     df_copy['Filing Date'] = pd.to_datetime(df_copy['Filing Date'], dayfirst=True)
-    tickers = df_copy['Ticker'].unique().tolist()
+    negative_cache = get_negative_cache()
+    tickers, skipped = negative_cache.split(df_copy['Ticker'].unique().tolist(), NO_FUNDAMENTALS)
+    if skipped:
+        print(f"- Skipping {len(skipped)} tickers without fundamentals in recent runs (negative cache)")
+        df_copy = df_copy[df_copy['Ticker'].isin(tickers)]
+    if df_copy.empty:
+        print("[INFO] No company-specific data could be processed.")
+        return pd.DataFrame()
 
     # --- Step 1: Bulk Data Downloads (with new market indices) ---
     print(f"Fetching fundamental data for {len(tickers)} tickers...")
     tk_objects = yf.Tickers(" ".join(tickers))
     
-    start_date = '1970-01-01'
     end_date = df_copy['Filing Date'].max() + pd.Timedelta(days=1)
     
-    print(f"Fetching historical prices for tickers from {start_date} to {end_date.date()}...")
-    hist_data = yf.download(tickers, start=start_date, end=end_date, group_by='ticker', progress=True, auto_adjust=False, threads=True)
+    if hist_data is None:
+        # Only the window the features look back over is downloaded, per ticker
+        bounds = df_copy.groupby('Ticker')['Filing Date'].agg(['min', 'max'])
+        windows = {
+            ticker: (get_history_start(first), last.normalize() + pd.Timedelta(days=1))
+            for ticker, first, last in bounds.itertuples(name=None)
+        }
+        print(f"Fetching historical prices for tickers from {min(start for start, _ in windows.values()).date()} to {end_date.date()}...")
+        hist_data = get_price_windows(windows, auto_adjust=False)
     
-    print("Fetching market index data (SPY, VIX, GSPC) for regime indicators...")
-    market_indices = yf.download('SPY ^VIX ^GSPC', start=start_date, end=end_date, auto_adjust=True, threads=True)
-    market_data_spy = market_indices['Close']['SPY'].to_frame().rename(columns={'SPY': 'Close'})
-    market_data_gspc = market_indices['Close']['^GSPC'].to_frame().rename(columns={'^GSPC': 'Close'})
-    market_data_vix = market_indices['Close']['^VIX'].to_frame().rename(columns={'^VIX': 'Close'})
+    if benchmark_data is None:
+        print("Fetching market index data (SPY, VIX, GSPC) for regime indicators...")
+        benchmark_data = get_benchmark_history(get_history_start(df_copy['Filing Date'].min()), end_date)
+    market_indices = pd.DataFrame({symbol: benchmark_data[symbol]['Close'] for symbol in ['SPY', '^VIX', '^GSPC']})
+    market_indices = market_indices.loc[market_indices.index < end_date.normalize()]
+    market_data_gspc = market_indices['^GSPC'].to_frame(name='Close')
+    market_data_vix = market_indices['^VIX'].to_frame(name='Close')
 
     # --- Step 2: Pre-calculate Market Regime Indicators ---
     print("[REGIME] Pre-calculating market regime indicators...")
@@ -269,20 +298,22 @@ def batch_fetch_financial_data(df, max_workers=4):
     # Drop any initial rows with NaNs from rolling calculations
     regime_df.dropna(inplace=True)
     
-    # --- Step 3: Process Company-Specific Tickers in Parallel (Unchanged) ---
-    results = []
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        future_to_row = {
-            executor.submit(process_single_ticker, row, tk_objects, hist_data, market_data_spy): row
-            for row in df_copy.to_dict('records')
-        }
-        for future in tqdm(as_completed(future_to_row), total=len(future_to_row), desc="Processing Tickers in Parallel"):
-            try:
-                result = future.result(timeout=30)
-                if result is not None:
-                    results.append(result)
-            except Exception as exc:
-                pass # Error handling remains the same
+    # --- Step 3: Point-in-time betas for every row in one batched pass ---
+    if return_matrix is None:
+        closes = {ticker: prices['Adj Close'] for ticker, prices in hist_data.items()}
+        return_matrix = build_return_matrix(closes, market_indices['SPY'])
+    betas = sample_point_in_time_beta(return_matrix, df_copy['Ticker'].tolist(), df_copy['Filing Date'].tolist())
+    
+    # --- Step 4: Process Company-Specific Tickers in Parallel ---
+    # Only the row's ticker and filing date travel to the workers of the shared I/O pool
+    rows = ({'Ticker': ticker, 'Filing Date': filing_date} for ticker, filing_date in zip(df_copy['Ticker'], df_copy['Filing Date']))
+    results = map_io(lambda row, beta: process_single_ticker(row, tk_objects, hist_data, beta, fundamentals_ttl),
+                     rows, betas, desc="Processing Tickers in Parallel")
+    results = [result for result in results if result is not None]
+    try:
+        negative_cache.save()
+    except Exception as e:
+        print(f"- Failed to write negative cache: {e}")
 
     if not results:
         print("[INFO] No company-specific data could be processed.")
@@ -290,7 +321,7 @@ def batch_fetch_financial_data(df, max_workers=4):
 
     company_ratios_df = pd.DataFrame(results)
 
-    # --- Step 4: Point-in-Time Merge of Regime Indicators ---
+    # --- Step 5: Point-in-Time Merge of Regime Indicators ---
     print("[REGIME] Merging market regime features into the final dataset...")
     
     # Ensure date columns are correctly formatted for merging
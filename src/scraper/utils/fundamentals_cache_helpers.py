@@ -0,0 +1,160 @@
+import os
+import threading
+import joblib
+import pandas as pd
+
+from .rate_limit_helpers import YAHOO_HOST, rate_limited_call
+
+# On-disk cache of per-ticker yfinance fundamentals (info plus annual statements). Statements
+# only change when a company reports, so entries are reused until they exceed the TTL or a new
+# fiscal period could have been published since they were fetched.
+FUNDAMENTALS_CACHE_DIR = os.path.join(os.path.dirname(__file__), '../../../data/cache/fundamentals')
+FUNDAMENTALS_TTL = pd.Timedelta(days=30)
+# Length of one reporting period of the (annual) statements
+STATEMENT_PERIOD = pd.Timedelta(days=365)
+STATEMENTS = ['balance_sheet', 'cashflow', 'financials']
+# yfinance returns an empty statement instead of raising when Yahoo throttles it, so a fetch with
+# empty info or an empty statement may be transient: it is retried after this TTL, keeps the
+# parts of the previous entry that came back empty, and only counts as "no fundamentals" once
+# that many consecutive fetches were incomplete.
+FUNDAMENTALS_RETRY_TTL = pd.Timedelta(hours=12)
+CONFIRM_INCOMPLETE_FETCHES = 2
+
+_locks = {}
+_locks_guard = threading.Lock()
+
+def _ticker_lock(ticker):
+    """One lock per ticker so concurrent rows of the same ticker fetch it only once."""
+    with _locks_guard:
+        return _locks.setdefault(ticker, threading.Lock())
+
+def _cache_path(ticker):
+    return os.path.join(FUNDAMENTALS_CACHE_DIR, f"{ticker.replace('/', '_')}.joblib")
+
+def load_cached_fundamentals(ticker):
+    """Return the cached fundamentals of a ticker, or None."""
+    path = _cache_path(ticker)
+    if not os.path.exists(path):
+        return None
+    try:
+        return joblib.load(path)
+    except Exception as e:
+        print(f"- Ignoring unreadable fundamentals cache for {ticker}: {e}")
+        return None
+
+def save_cached_fundamentals(ticker, fundamentals):
+    """Atomically write a ticker's fundamentals to the cache."""
+    os.makedirs(FUNDAMENTALS_CACHE_DIR, exist_ok=True)
+    path = _cache_path(ticker)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    joblib.dump(fundamentals, tmp_path)
+    os.replace(tmp_path, path)
+
+def latest_period(fundamentals):
+    """Most recent statement period end across the cached statements, or None."""
+    periods = []
+    for key in STATEMENTS:
+        stmt_df = fundamentals.get(key)
+        if stmt_df is not None and not stmt_df.empty:
+            periods.append(pd.to_datetime(stmt_df.columns).tz_localize(None).max())
+    return max(periods) if periods else None
+
+def is_complete(fundamentals):
+    """True if the info and every statement of an entry came back non-empty."""
+    return bool(fundamentals.get('info')) and all(
+        fundamentals.get(key) is not None and not fundamentals[key].empty for key in STATEMENTS)
+
+def is_confirmed_missing(fundamentals):
+    """True if repeated fetches, not a single (possibly throttled) one, returned incomplete fundamentals."""
+    return fundamentals.get('incomplete_fetches', 0) >= CONFIRM_INCOMPLETE_FETCHES
+
+def is_stale(fundamentals, now=None, ttl=FUNDAMENTALS_TTL):
+    """
+    A cache entry is stale once it is older than `ttl` (`FUNDAMENTALS_RETRY_TTL` for an
+    incomplete fetch), or when the next fiscal period has ended since it was fetched (so a
+    newer statement may be available).
+    """
+    now = now or pd.Timestamp.now()
+    if 'first_trade_date' not in fundamentals:
+        return True
+    if not fundamentals.get('complete', is_complete(fundamentals)):
+        ttl = min(ttl, FUNDAMENTALS_RETRY_TTL)
+    fetched_at = fundamentals['fetched_at']
+    if now - fetched_at > ttl:
+        return True
+    last = latest_period(fundamentals)
+    if last is None:
+        return False
+    next_period_end = last + STATEMENT_PERIOD
+    return fetched_at < next_period_end <= now
+
+def fetch_fundamentals(t_obj):
+    """Download info and statements for one yfinance Ticker object."""
+    # Every attribute access is a Yahoo request, so each one goes through the shared rate limiter
+    info = rate_limited_call(YAHOO_HOST, getattr, t_obj, 'info')
+    fundamentals = {'fetched_at': pd.Timestamp.now(), 'info': info or {}, 'first_trade_date': None}
+    for key in STATEMENTS:
+        fundamentals[key] = rate_limited_call(YAHOO_HOST, getattr, t_obj, key)
+
+    # IPO date fallback for tickers without firstTradeDateEpochUtc: first bar of the full monthly history
+    if not fundamentals['info'].get('firstTradeDateEpochUtc'):
+        history = rate_limited_call(YAHOO_HOST, t_obj.history, period='max', interval='1mo', auto_adjust=False)
+        first_bar = history['Close'].first_valid_index() if not history.empty else None
+        if first_bar is not None:
+            fundamentals['first_trade_date'] = pd.Timestamp(first_bar).tz_localize(None)
+    return fundamentals
+
+def merge_incomplete_fetch(fundamentals, previous):
+    """
+    Mark a fresh fetch as complete or not. An incomplete fetch keeps the previous entry's info
+    and statements where it came back empty, and counts consecutive incomplete fetches.
+    """
+    fundamentals['complete'] = is_complete(fundamentals)
+    if fundamentals['complete']:
+        fundamentals['incomplete_fetches'] = 0
+        return fundamentals
+    if previous is None:
+        fundamentals['incomplete_fetches'] = 1
+        return fundamentals
+    if not fundamentals['info'] and previous.get('info'):
+        fundamentals['info'] = previous['info']
+    for key in STATEMENTS:
+        stmt_df = fundamentals.get(key)
+        if (stmt_df is None or stmt_df.empty) and previous.get(key) is not None:
+            fundamentals[key] = previous[key]
+    if fundamentals['first_trade_date'] is None:
+        fundamentals['first_trade_date'] = previous.get('first_trade_date')
+    previous_complete = previous.get('complete', is_complete(previous))
+    fundamentals['incomplete_fetches'] = 1 if previous_complete else previous.get('incomplete_fetches', 0) + 1
+    return fundamentals
+
+def get_fundamentals(ticker, tk_objects, ttl=FUNDAMENTALS_TTL):
+    """
+    Return {'fetched_at', 'info', 'first_trade_date', 'balance_sheet', 'cashflow', 'financials',
+    'complete', 'incomplete_fetches'} for a ticker, served from the cache unless it is stale.
+    Returns None if yfinance has no such ticker.
+    """
+    with _ticker_lock(ticker):
+        previous = load_cached_fundamentals(ticker)
+        if previous is not None and not is_stale(previous, ttl=ttl):
+            return previous
+
+        t_obj = tk_objects.tickers.get(ticker)
+        if t_obj is None:
+            return previous
+        fundamentals = merge_incomplete_fetch(fetch_fundamentals(t_obj), previous)
+        try:
+            save_cached_fundamentals(ticker, fundamentals)
+        except Exception as e:
+            print(f"- Failed to write fundamentals cache for {ticker}: {e}")
+        return fundamentals
+
+def pick_latest(stmt_df, filing_date):
+    """Return the latest statement column published on or before the filing date, without modifying `stmt_df`."""
+    if stmt_df is None or stmt_df.empty:
+        return None
+    periods = pd.to_datetime(stmt_df.columns).tz_localize(None)
+    valid = periods[periods <= filing_date]
+    if valid.empty:
+        return None
+    return stmt_df.iloc[:, list(periods).index(valid.max())]
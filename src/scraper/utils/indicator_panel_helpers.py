@@ -0,0 +1,242 @@
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Vectorized technical-indicator engine. Every ticker's NA-free daily bars are stacked into
+# left-aligned (tickers × days) float arrays padded with NaN at the end, and each indicator is
+# computed for all tickers in one pass. Formulas follow the `ta` library (see
+# technical_indicators_helpers.calculate_indicator_series) bar for bar, including its
+# zero-filled warm-up for ADX and ATR, so both engines return the same values.
+
+PANEL_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+def build_price_panel(prices):
+    """
+    Stack per-ticker OHLCV frames into aligned 2-D arrays.
+
+    Args:
+        prices (dict): {ticker: DataFrame with Open/High/Low/Close/Volume columns}
+
+    Returns:
+        dict: 'tickers', per-ticker 'dates' arrays, 'lengths' and one (tickers × days)
+              float64 array per OHLCV column (lower-case keys).
+    """
+    tickers = list(prices)
+    frames = [prices[ticker][PANEL_COLUMNS].dropna() for ticker in tickers]
+    lengths = np.array([len(frame) for frame in frames], dtype=int)
+    width = int(lengths.max()) if len(lengths) else 0
+
+    panel = {'tickers': tickers, 'lengths': lengths, 'dates': [frame.index.values for frame in frames]}
+    for col in PANEL_COLUMNS:
+        values = np.full((len(tickers), width), np.nan)
+        for i, frame in enumerate(frames):
+            values[i, :lengths[i]] = frame[col].to_numpy(dtype='float64')
+        panel[col.lower()] = values
+    return panel
+
+def _shift(x, periods=1):
+    out = np.full_like(x, np.nan)
+    out[:, periods:] = x[:, :-periods]
+    return out
+
+def _rolling(x, window, func):
+    out = np.full_like(x, np.nan)
+    if x.shape[1] >= window:
+        out[:, window - 1:] = func(sliding_window_view(x, window, axis=1), axis=-1)
+    return out
+
+def _ewm(x, alpha, adjust, min_periods=0):
+    """Exponentially weighted mean along the day axis with pandas' ewm recursion and NaN handling."""
+    out = np.full_like(x, np.nan)
+    weighted = np.full(x.shape[0], np.nan)
+    old_wt = np.ones(x.shape[0])
+    count = np.zeros(x.shape[0], dtype=int)
+    new_wt = 1.0 if adjust else alpha
+    for t in range(x.shape[1]):
+        cur = x[:, t]
+        valid = ~np.isnan(cur)
+        started = ~np.isnan(weighted)
+
+        old_wt = np.where(started, old_wt * (1 - alpha), old_wt)
+        blended = np.where(weighted != cur, (old_wt * weighted + new_wt * cur) / (old_wt + new_wt), weighted)
+        update = started & valid
+        weighted = np.where(update, blended, weighted)
+        old_wt = np.where(update, old_wt + new_wt if adjust else 1.0, old_wt)
+
+        first = ~started & valid
+        weighted = np.where(first, cur, weighted)
+        old_wt = np.where(first, 1.0, old_wt)
+
+        count += valid
+        out[:, t] = np.where(count >= max(min_periods, 1), weighted, np.nan)
+    return out
+
+def _wilder_from_mean(x, window):
+    """ta's ATR smoothing: zeros during warm-up, the plain mean at `window - 1`, then Wilder's recursion."""
+    out = np.zeros_like(x)
+    if x.shape[1] < window:
+        return out
+    out[:, window - 1] = x[:, :window].mean(axis=1)
+    for t in range(window, x.shape[1]):
+        out[:, t] = (out[:, t - 1] * (window - 1) + x[:, t]) / float(window)
+    return out
+
+def _wilder_sum(x, window):
+    """ta's ADX running sums: the sum of bars 1..window, then s - s / window + x."""
+    out = np.full_like(x, np.nan)
+    if x.shape[1] <= window:
+        return out
+    out[:, window] = x[:, 1:window + 1].sum(axis=1)
+    for t in range(window + 1, x.shape[1]):
+        out[:, t] = out[:, t - 1] - (out[:, t - 1] / float(window)) + x[:, t]
+    return out
+
+def _adx(high, low, close, window=14):
+    close_prev = _shift(close)
+    directional_movement = np.maximum(high, close_prev) - np.minimum(low, close_prev)
+    diff_up = high - _shift(high)
+    diff_down = _shift(low) - low
+    pos = np.abs(((diff_up > diff_down) & (diff_up > 0)) * diff_up)
+    neg = np.abs(((diff_down > diff_up) & (diff_down > 0)) * diff_down)
+
+    trs = _wilder_sum(directional_movement, window)
+    dip = _wilder_sum(pos, window)
+    din = _wilder_sum(neg, window)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        di_pos = np.where(trs != 0, 100 * (dip / trs), 0.0)
+        di_neg = np.where(trs != 0, 100 * (din / trs), 0.0)
+        dx = np.where(di_pos + di_neg != 0, 100 * np.abs((di_pos - di_neg) / (di_pos + di_neg)), 0.0)
+
+    adx = np.zeros_like(close)
+    first = 2 * window - 1
+    if close.shape[1] <= first:
+        return adx
+    adx[:, first] = dx[:, window:first + 1].mean(axis=1)
+    for t in range(first + 1, close.shape[1]):
+        adx[:, t] = ((adx[:, t - 1] * (window - 1)) + dx[:, t]) / float(window)
+    return adx
+
+def calculate_indicator_panel(panel):
+    """
+    Calculate every technical indicator for all tickers of a price panel in one vectorized pass.
+
+    Returns:
+        dict: {indicator name: (tickers × days) array}; values past a ticker's length are undefined.
+    """
+    high, low, close, volume = panel['high'], panel['low'], panel['close'], panel['volume']
+    indicators = {}
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # --- Moving Averages ---
+        indicators['SMA_10'] = _rolling(close, 10, np.mean)
+        indicators['SMA_50'] = _rolling(close, 50, np.mean)
+        indicators['EMA_10'] = _ewm(close, 2 / 11, adjust=True)
+        indicators['EMA_50'] = _ewm(close, 2 / 51, adjust=True)
+
+        # --- Momentum Indicators ---
+        diff = close - _shift(close)
+        up = np.where(diff > 0, diff, 0.0)
+        down = -np.where(diff < 0, diff, 0.0)
+        ema_up = _ewm(up, 1 / 14, adjust=False, min_periods=14)
+        ema_down = _ewm(down, 1 / 14, adjust=False, min_periods=14)
+        indicators['RSI_14'] = np.where(ema_down == 0, 100, 100 - (100 / (1 + ema_up / ema_down)))
+
+        ema_fast = _ewm(close, 2 / 13, adjust=False, min_periods=12)
+        ema_slow = _ewm(close, 2 / 27, adjust=False, min_periods=26)
+        macd = ema_fast - ema_slow
+        macd_signal = _ewm(macd, 2 / 10, adjust=False, min_periods=9)
+        indicators['MACD'] = macd
+        indicators['MACD_Signal'] = macd_signal
+        indicators['MACD_Hist'] = macd - macd_signal
+
+        indicators['ADX_14'] = _adx(high, low, close, window=14)
+
+        typical_price = (high + low + close) / 3.0
+        tp_mean = _rolling(typical_price, 14, np.mean)
+        tp_windows = sliding_window_view(typical_price, 14, axis=1) if typical_price.shape[1] >= 14 else None
+        tp_mad = np.full_like(typical_price, np.nan)
+        if tp_windows is not None:
+            tp_mad[:, 13:] = np.mean(np.abs(tp_windows - tp_windows.mean(axis=-1, keepdims=True)), axis=-1)
+        indicators['CCI_14'] = (typical_price - tp_mean) / (0.015 * tp_mad)
+
+        close_10 = _shift(close, 10)
+        indicators['ROC'] = ((close - close_10) / close_10) * 100
+
+        tp_prev = _shift(typical_price)
+        up_down = np.where(typical_price > tp_prev, 1, np.where(typical_price < tp_prev, -1, 0))
+        money_flow = typical_price * volume * up_down
+        positive_flow = _rolling(np.where(money_flow >= 0.0, money_flow, 0.0), 14, np.sum)
+        negative_flow = np.abs(_rolling(np.where(money_flow < 0.0, money_flow, 0.0), 14, np.sum))
+        indicators['MFI_14'] = 100 - (100 / (1 + positive_flow / negative_flow))
+
+        highest_high = _rolling(high, 14, np.max)
+        lowest_low = _rolling(low, 14, np.min)
+        indicators['WILLR_14'] = -100 * (highest_high - close) / (highest_high - lowest_low)
+        stoch_k = 100 * (close - lowest_low) / (highest_high - lowest_low)
+        indicators['STOCH_K'] = stoch_k
+        indicators['STOCH_D'] = _rolling(stoch_k, 3, np.mean)
+
+        # --- Volatility Indicators ---
+        close_prev = _shift(close)
+        true_range = np.fmax(high - low, np.fmax(np.abs(high - close_prev), np.abs(low - close_prev)))
+        indicators['ATR_14'] = _wilder_from_mean(true_range, 14)
+
+        band_mean = _rolling(close, 20, np.mean)
+        band_std = _rolling(close, 20, np.std)
+        indicators['Bollinger_Upper'] = band_mean + 2 * band_std
+        indicators['Bollinger_Lower'] = band_mean - 2 * band_std
+
+        # --- Volume Indicators ---
+        signed_volume = np.where(close < close_prev, -volume, volume)
+        indicators['OBV'] = np.cumsum(signed_volume, axis=1)
+
+    return indicators
+
+def locate_windows(panel, ticker_index, windows):
+    """
+    Find the first and last bar of each [start, end) window with a searchsorted lookup.
+
+    Args:
+        ticker_index (np.ndarray): Panel row of each window.
+        windows (list): (start_date, end_date) per window.
+
+    Returns:
+        tuple: (first, last) bar positions; `last` is the last bar strictly before `end`.
+    """
+    first = np.zeros(len(windows), dtype=int)
+    last = np.zeros(len(windows), dtype=int)
+    for k, (i, (start_date, end_date)) in enumerate(zip(ticker_index, windows)):
+        dates = panel['dates'][i]
+        first[k] = dates.searchsorted(start_date.normalize().to_datetime64(), side='left')
+        last[k] = dates.searchsorted(end_date.normalize().to_datetime64(), side='left') - 1
+    return first, last
+
+def sample_indicator_panel(panel, indicators, ticker_index, windows, min_bars=50):
+    """
+    Sample indicator arrays at the last bar of each as-of window.
+
+    OBV is re-based to the window start, since it accumulates from the first bar it sees.
+    Windows with fewer than `min_bars` bars get NaN for every indicator.
+
+    Returns:
+        pd.DataFrame: One row per window, one column per indicator.
+    """
+    if panel['close'].shape[1] == 0:
+        return pd.DataFrame(np.nan, index=range(len(windows)), columns=list(indicators))
+    ticker_index = np.asarray(ticker_index, dtype=int)
+    first, last = locate_windows(panel, ticker_index, windows)
+    enough = (last - first + 1) >= min_bars
+    safe_last = np.clip(last, 0, None)
+    safe_first = np.clip(first, 0, panel['close'].shape[1] - 1)
+
+    samples = {}
+    for name, values in indicators.items():
+        samples[name] = np.where(enough, values[ticker_index, safe_last], np.nan)
+    samples['OBV'] = np.where(
+        enough,
+        indicators['OBV'][ticker_index, safe_last] - indicators['OBV'][ticker_index, safe_first]
+        + panel['volume'][ticker_index, safe_first],
+        np.nan,
+    )
+    return pd.DataFrame(samples)
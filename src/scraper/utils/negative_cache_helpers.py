@@ -0,0 +1,121 @@
+import os
+import json
+import threading
+import pandas as pd
+
+# Persistent record of tickers whose lookups keep failing (delisted, OTC or malformed symbols).
+# Known-bad tickers are skipped until their entry expires; every repeated failure doubles the
+# expiry up to MAX_BACKOFF, and a successful lookup clears the entry.
+NEGATIVE_CACHE_PATH = os.path.join(os.path.dirname(__file__), '../../../data/cache/negative_tickers.json')
+
+# Failure kinds and how long a first failure is trusted
+NO_PRICE_DATA = 'no_price_data'
+NO_FUNDAMENTALS = 'no_fundamentals'
+NEGATIVE_CACHE_TTL = {
+    NO_PRICE_DATA: pd.Timedelta(days=7),
+    NO_FUNDAMENTALS: pd.Timedelta(days=14),
+}
+MAX_BACKOFF = 8
+
+class NegativeCache:
+    """Thread-safe {ticker: {kind: {'first', 'last', 'count'}}} store with hit/miss statistics."""
+
+    def __init__(self, path=None):
+        self.path = path = path or NEGATIVE_CACHE_PATH
+        self.entries = {}
+        self.stats = {}
+        self._failed = set()
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f)
+            except Exception as e:
+                print(f"- Ignoring unreadable negative cache: {e}")
+
+    def _count(self, kind, stat, n=1):
+        counts = self.stats.setdefault(kind, {'hits': 0, 'misses': 0, 'failures': 0, 'recoveries': 0})
+        counts[stat] += n
+
+    def _expires(self, entry, kind):
+        backoff = min(2 ** (entry['count'] - 1), MAX_BACKOFF)
+        return pd.Timestamp(entry['last']) + NEGATIVE_CACHE_TTL[kind] * backoff
+
+    def is_known_bad(self, ticker, kind, now=None):
+        """True if the ticker failed this kind of lookup recently enough to be skipped."""
+        now = now or pd.Timestamp.now()
+        with self._lock:
+            entry = self.entries.get(ticker, {}).get(kind)
+            hit = entry is not None and now < self._expires(entry, kind)
+            self._count(kind, 'hits' if hit else 'misses')
+            return hit
+
+    def split(self, tickers, kind):
+        """Split tickers into (to_fetch, skipped) lists."""
+        to_fetch, skipped = [], []
+        for ticker in tickers:
+            (skipped if self.is_known_bad(ticker, kind) else to_fetch).append(ticker)
+        return to_fetch, skipped
+
+    def record_failure(self, ticker, kind):
+        """Record a failed lookup; several failures of one ticker within a run count once."""
+        now = pd.Timestamp.now().isoformat(timespec='seconds')
+        with self._lock:
+            if (ticker, kind) in self._failed:
+                return
+            self._failed.add((ticker, kind))
+            entry = self.entries.setdefault(ticker, {}).get(kind)
+            if entry is None:
+                entry = {'first': now, 'count': 0}
+            entry['last'] = now
+            entry['count'] += 1
+            self.entries[ticker][kind] = entry
+            self._count(kind, 'failures')
+
+    def record_success(self, ticker, kind):
+        with self._lock:
+            self._failed.discard((ticker, kind))
+            kinds = self.entries.get(ticker)
+            if kinds and kinds.pop(kind, None) is not None:
+                self._count(kind, 'recoveries')
+                if not kinds:
+                    del self.entries[ticker]
+
+    def save(self):
+        """Atomically write the cache, dropping entries that expired long ago."""
+        now = pd.Timestamp.now()
+        with self._lock:
+            for ticker in list(self.entries):
+                kinds = self.entries[ticker]
+                for kind in [k for k, entry in kinds.items() if now > self._expires(entry, k) + NEGATIVE_CACHE_TTL[k] * MAX_BACKOFF]:
+                    del kinds[kind]
+                if not kinds:
+                    del self.entries[ticker]
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f, indent=1, sort_keys=True)
+            os.replace(tmp_path, self.path)
+
+    def report(self):
+        """Print the hit/miss statistics of this run."""
+        with self._lock:
+            if not self.stats:
+                return
+            print(f"- Negative cache ({len(self.entries)} known-bad tickers):")
+            for kind, counts in sorted(self.stats.items()):
+                lookups = counts['hits'] + counts['misses']
+                hit_rate = counts['hits'] / lookups if lookups else 0.0
+                print(f"  {kind}: {counts['hits']} skipped / {lookups} lookups ({hit_rate:.0%}), "
+                      f"{counts['failures']} new failures, {counts['recoveries']} recovered")
+
+_negative_cache = None
+_negative_cache_lock = threading.Lock()
+
+def get_negative_cache():
+    """Return the process-wide negative cache, loading it on first use."""
+    global _negative_cache
+    with _negative_cache_lock:
+        if _negative_cache is None:
+            _negative_cache = NegativeCache()
+        return _negative_cache
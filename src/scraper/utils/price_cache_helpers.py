@@ -0,0 +1,325 @@
+import os
+import json
+import threading
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import yfinance as yf
+from yfinance.exceptions import YFRateLimitError
+
+from .rate_limit_helpers import YAHOO_HOST, is_rate_limit_message, rate_limited_call
+from .executor_helpers import map_io
+from .negative_cache_helpers import NO_PRICE_DATA, get_negative_cache
+
+# Local columnar OHLCV store: one Parquet partition per ticker holding raw daily bars,
+# 'Adj Close' and corporate actions. Adjusted views are derived on read so both the
+# technical-indicator stage (adjusted) and the financial-ratio stage (raw) share one copy.
+PRICE_CACHE_DIR = os.path.join(os.path.dirname(__file__), '../../../data/cache/prices')
+RAW_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Adj Close', 'Volume']
+ACTION_COLUMNS = ['Dividends', 'Stock Splits']
+DOWNLOAD_CHUNK_SIZE = 100
+BENCHMARK_TICKERS = ['SPY', '^VIX', '^GSPC']
+# An uncached ticker whose window spans at least this many business days but returns no bars
+# is recorded in the negative cache (shorter windows may legitimately fall on holidays)
+MIN_NEGATIVE_WINDOW_BDAYS = 5
+# yfinance errors that mean Yahoo has no bars for the symbol (delisted, unknown); any other
+# per-ticker error (throttling, network) is transient and never reaches the negative cache
+MISSING_DATA_ERRORS = ('YFPricesMissingError', 'YFTzMissingError', 'YFTickerMissingError')
+
+_COVERAGE_KEY = b'insideralgobot.coverage'
+
+def _cache_path(ticker):
+    return os.path.join(PRICE_CACHE_DIR, f"{ticker.replace('/', '_')}.parquet")
+
+def load_cached_prices(ticker):
+    """
+    Load the cached bars for a ticker.
+
+    Returns:
+        tuple: (prices, coverage_start, coverage_end) where the coverage is the half-open
+               date range [start, end) that has already been fetched, or (None, None, None).
+    """
+    path = _cache_path(ticker)
+    if not os.path.exists(path):
+        return None, None, None
+    try:
+        table = pq.read_table(path)
+        coverage = json.loads(table.schema.metadata[_COVERAGE_KEY])
+    except Exception as e:
+        print(f"- Ignoring unreadable price cache for {ticker}: {e}")
+        return None, None, None
+    return table.to_pandas(), pd.Timestamp(coverage['start']), pd.Timestamp(coverage['end'])
+
+def save_cached_prices(ticker, prices, coverage_start, coverage_end):
+    """Atomically write a ticker's bars and fetched date range to the store."""
+    os.makedirs(PRICE_CACHE_DIR, exist_ok=True)
+    path = _cache_path(ticker)
+    table = pa.Table.from_pandas(prices, preserve_index=True)
+    metadata = dict(table.schema.metadata or {})
+    metadata[_COVERAGE_KEY] = json.dumps({
+        'start': coverage_start.strftime('%Y-%m-%d'),
+        'end': coverage_end.strftime('%Y-%m-%d'),
+    }).encode()
+    table = table.replace_schema_metadata(metadata)
+
+    # Write to a private temp file first so concurrent workers never see a partial file
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    pq.write_table(table, tmp_path)
+    os.replace(tmp_path, path)
+
+def yahoo_download(tickers, **kwargs):
+    """
+    Fetch each ticker's bars with `yf.Ticker.history` on the shared 'download' pool and return
+    ({ticker: DataFrame}, {TICKER: repr(error)}). Unlike yf.download, which keeps every call's
+    results and errors in yfinance's module globals, nothing is shared between concurrent
+    calls. A throttled ticker is raised as YFRateLimitError; wrapped in `rate_limited_call`,
+    that halves the Yahoo rate and retries.
+    """
+    if isinstance(tickers, str):
+        tickers = [tickers]
+
+    def fetch(ticker):
+        try:
+            return yf.Ticker(ticker).history(raise_errors=True, **kwargs), None
+        except Exception as e:
+            return None, repr(e)
+
+    data, errors = {}, {}
+    for ticker, (frame, error) in zip(tickers, map_io(fetch, tickers, pool='download')):
+        if error is not None:
+            errors[ticker.upper()] = error
+        elif frame is not None and not frame.empty:
+            data[ticker] = frame
+    if any(is_rate_limit_message(error) for error in errors.values()):
+        raise YFRateLimitError()
+    return data, errors
+
+def download_price_data(tickers, start, end):
+    """
+    Download raw daily bars plus corporate actions for several tickers in one request.
+
+    Returns:
+        tuple: ({ticker: DataFrame} for tickers with bars, set of tickers that failed with a
+               transient error rather than a missing-data error)
+    """
+    data, errors = rate_limited_call(YAHOO_HOST, yahoo_download, tickers, start=start, end=end, interval='1d',
+                                     auto_adjust=False, actions=True)
+    errored = {
+        ticker for ticker in tickers
+        if ticker.upper() in errors and not errors[ticker.upper()].startswith(MISSING_DATA_ERRORS)
+    }
+
+    frames = {}
+    for ticker, frame in data.items():
+        frame = frame.dropna(subset=['Open', 'High', 'Low', 'Close'], how='all')
+        if frame.empty:
+            continue
+        if frame.index.tz is not None:
+            frame.index = frame.index.tz_localize(None)
+        for col in ACTION_COLUMNS:
+            if col not in frame.columns:
+                frame[col] = 0.0
+        frame.columns.name = None
+        frame.index.name = 'Date'
+        frames[ticker] = frame[RAW_COLUMNS + ACTION_COLUMNS]
+    return frames, errored
+
+def _has_corporate_actions(prices):
+    return bool((prices[ACTION_COLUMNS].fillna(0) != 0).any().any())
+
+def plan_downloads(requests, chunk_size=DOWNLOAD_CHUNK_SIZE, max_slack=pd.Timedelta(days=45)):
+    """
+    Pack (ticker, start, end) ranges into a few multi-ticker download batches.
+
+    Ranges are sorted by start date and greedily merged into a batch as long as the batch
+    holds at most `chunk_size` tickers and its union window is no more than `max_slack`
+    longer than the shortest range in it, so short daily tails never ride along with
+    multi-year history requests.
+
+    Returns:
+        list: [(tickers, start, end)] with one entry per download request.
+    """
+    batches = []
+    tickers, batch_start, batch_end, shortest = [], None, None, None
+    for ticker, start, end in sorted(requests, key=lambda r: (r[1], r[2])):
+        if tickers:
+            union_end = max(batch_end, end)
+            union_shortest = min(shortest, end - start)
+            if len(tickers) < chunk_size and (union_end - batch_start) - union_shortest <= max_slack:
+                if ticker not in tickers:
+                    tickers.append(ticker)
+                batch_end, shortest = union_end, union_shortest
+                continue
+            batches.append((tickers, batch_start, batch_end))
+        tickers, batch_start, batch_end, shortest = [ticker], start, end, end - start
+    if tickers:
+        batches.append((tickers, batch_start, batch_end))
+    return batches
+
+def _fetch_ranges(requests):
+    """
+    Download a list of (ticker, start, end) ranges using the batches from `plan_downloads`.
+
+    Returns:
+        tuple: ({ticker: DataFrame} with the bars of every range that returned data,
+                {ticker: [(start, end)]} with the batch windows whose download failed with a
+                transient error)
+    """
+    fetched, errored = {}, {}
+    for tickers, start, end in plan_downloads(requests):
+        try:
+            frames, failed = download_price_data(tickers, start, end)
+            for ticker, frame in frames.items():
+                fetched.setdefault(ticker, []).append(frame)
+            if failed:
+                print(f"- Price download failed for {len(failed)} tickers ({start.date()} → {end.date()}); they are retried on the next run.")
+        except Exception as e:
+            failed = tickers
+            print(f"- Price download failed for {len(tickers)} tickers ({start.date()} → {end.date()}): {e}")
+        for ticker in failed:
+            errored.setdefault(ticker, []).append((start, end))
+    return {ticker: pd.concat(frames).sort_index() for ticker, frames in fetched.items()}, errored
+
+def refresh_price_cache(windows):
+    """
+    Make sure the store covers each ticker's [start, end) window, fetching only the missing
+    head and tail of each cached range. Bars dated today are never marked as final.
+    Uncached tickers that recently returned no bars at all are skipped (see `negative_cache_helpers`).
+
+    Args:
+        windows (dict): {ticker: (start, end)}
+
+    Returns:
+        dict: {ticker: DataFrame} with the full cached bars of every ticker that has data.
+    """
+    today = pd.Timestamp.today().normalize()
+    negative_cache = get_negative_cache()
+
+    cached, coverage, stored, requests, probed = {}, {}, {}, [], []
+    for ticker, (start, end) in windows.items():
+        start = pd.Timestamp(start).normalize()
+        end = pd.Timestamp(end).normalize()
+        final_end = min(end, today)
+
+        prices, cov_start, cov_end = load_cached_prices(ticker)
+        if prices is None:
+            if ticker not in BENCHMARK_TICKERS and negative_cache.is_known_bad(ticker, NO_PRICE_DATA):
+                continue
+            requests.append((ticker, start, end))
+            if len(pd.bdate_range(start, final_end - pd.Timedelta(days=1))) >= MIN_NEGATIVE_WINDOW_BDAYS:
+                probed.append(ticker)
+            coverage[ticker] = (start, final_end)
+            continue
+
+        cached[ticker] = prices
+        stored[ticker] = (cov_start, cov_end)
+        coverage[ticker] = (min(start, cov_start), max(final_end, cov_end))
+        if start < cov_start:
+            requests.append((ticker, start, cov_start))
+        if end > cov_end:
+            requests.append((ticker, cov_end, end))
+
+    if not requests:
+        return cached
+
+    fetched, errored = _fetch_ranges(requests)
+
+    # Uncached tickers that came back empty without a transient error (delisted, OTC, malformed)
+    # are not asked for again until their entry expires
+    for ticker in probed:
+        if ticker in fetched:
+            negative_cache.record_success(ticker, NO_PRICE_DATA)
+        elif ticker not in errored:
+            negative_cache.record_failure(ticker, NO_PRICE_DATA)
+    if probed:
+        try:
+            negative_cache.save()
+        except Exception as e:
+            print(f"- Failed to write negative cache: {e}")
+
+    # A dividend or split inside a newly appended tail rescales all earlier adjusted bars,
+    # so those tickers are refetched over their whole covered range instead of appended.
+    refetch = []
+    for ticker, new_bars in fetched.items():
+        if ticker not in cached:
+            continue
+        tail = new_bars.loc[new_bars.index > cached[ticker].index.max()]
+        if _has_corporate_actions(tail):
+            window_end = pd.Timestamp(windows[ticker][1]).normalize()
+            refetch.append((ticker, coverage[ticker][0], max(window_end, coverage[ticker][1])))
+    if refetch:
+        refetched, refetch_errored = _fetch_ranges(refetch)
+        for ticker, full_bars in refetched.items():
+            fetched[ticker] = full_bars
+            cached.pop(ticker, None)
+            if ticker not in refetch_errored:
+                errored.pop(ticker, None)
+
+    for ticker, new_bars in fetched.items():
+        prices = pd.concat([cached[ticker], new_bars]) if ticker in cached else new_bars
+        prices = prices[~prices.index.duplicated(keep='last')].sort_index()
+        cov_start, cov_end = coverage[ticker]
+        if ticker in errored:
+            # Only the side whose download came back is covered; a failed head or tail keeps
+            # its stored bound so the next run asks for it again
+            if ticker not in stored:
+                cached[ticker] = prices
+                continue
+            old_start, old_end = stored[ticker]
+            if any(start < old_start for start, _ in errored[ticker]):
+                cov_start = old_start
+            if any(end > old_end for _, end in errored[ticker]):
+                cov_end = old_end
+        try:
+            save_cached_prices(ticker, prices, cov_start, cov_end)
+        except Exception as e:
+            print(f"- Failed to write price cache for {ticker}: {e}")
+        cached[ticker] = prices
+    return cached
+
+def adjust_prices(prices):
+    """Derive split/dividend adjusted OHLCV bars the same way yfinance's auto_adjust does."""
+    ratio = (prices['Adj Close'] / prices['Close']).to_numpy()
+    return pd.DataFrame({
+        'Open': prices['Open'] * ratio,
+        'High': prices['High'] * ratio,
+        'Low': prices['Low'] * ratio,
+        'Close': prices['Adj Close'],
+        'Volume': prices['Volume'],
+    }, index=prices.index)
+
+def get_price_windows(windows, auto_adjust=True):
+    """
+    Return daily bars for a separate [start, end) window per ticker, served from the local store.
+
+    Args:
+        windows (dict): {ticker: (start, end)}; `end` is exclusive like in yf.download.
+        auto_adjust (bool): Return split/dividend adjusted OHLCV (True) or raw bars
+                            including 'Adj Close' (False).
+
+    Returns:
+        dict: {ticker: DataFrame}, only for tickers with bars inside their window.
+    """
+    cached = refresh_price_cache(windows)
+
+    history = {}
+    for ticker, prices in cached.items():
+        start, end = (pd.Timestamp(d).normalize() for d in windows[ticker])
+        window = prices.loc[(prices.index >= start) & (prices.index < end)]
+        if window.empty:
+            continue
+        history[ticker] = adjust_prices(window) if auto_adjust else window[RAW_COLUMNS].copy()
+    return history
+
+def get_price_history(tickers, start, end, auto_adjust=True):
+    """Return daily bars in the same [start, end) window for several tickers (see `get_price_windows`)."""
+    return get_price_windows({ticker: (start, end) for ticker in tickers}, auto_adjust=auto_adjust)
+
+def get_benchmark_history(start, end):
+    """
+    Fetch the benchmark (SPY) and regime index (^VIX, ^GSPC) series once for a date range.
+
+    Returns:
+        dict: {symbol: adjusted OHLCV DataFrame}
+    """
+    return get_price_history(BENCHMARK_TICKERS, start, end, auto_adjust=True)
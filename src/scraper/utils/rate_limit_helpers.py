@@ -0,0 +1,131 @@
+import re
+import time
+import threading
+from urllib.parse import urlparse
+
+# Per-host token-bucket rate limiting for every upstream the scraper talks to. Each bucket adapts
+# its refill rate AIMD-style: it grows additively on every successful call up to `max_rate` and is
+# halved (with a pause) whenever the host answers 429/401, so throughput settles just below the
+# host's ceiling. All fetches run on threads of a single process, so in-process locks suffice.
+OPENINSIDER_HOST = 'openinsider.com'
+YAHOO_HOST = 'finance.yahoo.com'
+
+RATE_LIMITS = {
+    OPENINSIDER_HOST: {'rate': 2.0, 'burst': 4, 'max_rate': 5.0},
+    YAHOO_HOST: {'rate': 4.0, 'burst': 8, 'max_rate': 10.0},
+}
+DEFAULT_RATE_LIMIT = {'rate': 2.0, 'burst': 4, 'max_rate': 5.0}
+THROTTLE_STATUS_CODES = (429, 401)
+THROTTLE_MESSAGES = ('too many requests', 'rate limit', 'unauthorized')
+# A 401/429 status inside an error text, e.g. "HTTP Error 429" or "401 Client Error: ...";
+# bare numbers (prices, tickers, timestamps) are not throttles
+THROTTLE_STATUS_PATTERN = re.compile(r'\b(?:http(?: error)?|status(?: code)?)[\s:=]*(?:401|429)\b|\b(?:401|429) client error\b')
+
+class AdaptiveRateLimiter:
+    """Thread-safe token bucket with additive-increase / multiplicative-decrease of its rate."""
+
+    def __init__(self, rate, burst, max_rate, min_rate=0.2, increase=0.05, decrease=0.5, cooldown=5.0):
+        self.rate = rate
+        self.burst = burst
+        self.max_rate = max_rate
+        self.min_rate = min_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.cooldown = cooldown
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        """Block until a request may be sent."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                wait = self._paused_until - now
+                if wait <= 0:
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def on_success(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_throttle(self, retry_after=None):
+        """Halve the rate and pause the bucket; throttles during an ongoing pause only extend it."""
+        with self._lock:
+            now = time.monotonic()
+            if now >= self._paused_until:
+                self.rate = max(self.min_rate, self.rate * self.decrease)
+            self._tokens = 0.0
+            self._updated = now
+            self._paused_until = max(self._paused_until, now + (retry_after or self.cooldown))
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+def get_rate_limiter(host):
+    """Return the shared limiter of a host (sub-domains share their parent's bucket)."""
+    host = (host or '').lower()
+    key = next((known for known in RATE_LIMITS if host == known or host.endswith('.' + known)), host)
+    with _limiters_lock:
+        if key not in _limiters:
+            _limiters[key] = AdaptiveRateLimiter(**RATE_LIMITS.get(key, DEFAULT_RATE_LIMIT))
+        return _limiters[key]
+
+def host_of(url):
+    return urlparse(url).hostname or ''
+
+def is_rate_limit_message(message):
+    """True for error messages (or reprs) that report a rate limit."""
+    message = str(message)
+    if 'YFRateLimitError' in message:
+        return True
+    message = message.lower()
+    return any(text in message for text in THROTTLE_MESSAGES) or THROTTLE_STATUS_PATTERN.search(message) is not None
+
+def is_rate_limit_error(exc):
+    """True for 429/401 responses and yfinance's rate-limit errors."""
+    response = getattr(exc, 'response', None)
+    if getattr(response, 'status_code', None) in THROTTLE_STATUS_CODES:
+        return True
+    if type(exc).__name__ == 'YFRateLimitError':
+        return True
+    return is_rate_limit_message(exc)
+
+def _retry_after(exc):
+    response = getattr(exc, 'response', None)
+    value = getattr(response, 'headers', {}).get('Retry-After') if response is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+def rate_limited_call(host, fn, *args, retries=3, **kwargs):
+    """
+    Call `fn` once a token of the host's bucket is available. Rate-limit errors throttle the
+    bucket and are retried up to `retries` times; any other error is raised immediately.
+    """
+    limiter = get_rate_limiter(host)
+    for attempt in range(retries + 1):
+        limiter.acquire()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as exc:
+            if not is_rate_limit_error(exc):
+                raise
+            limiter.on_throttle(_retry_after(exc))
+            if attempt == retries:
+                raise
+            print(f"--> [RATE LIMIT] {host}: backing off (attempt {attempt + 1}/{retries}, {limiter.rate:.2f} req/s)")
+            continue
+        limiter.on_success()
+        return result
@@ -0,0 +1,172 @@
+import numpy as np
+import pandas as pd
+
+# Shared stock-vs-benchmark return matrix. Each ticker's closes are joined with the benchmark
+# (SPY) on their common dates and stored left-aligned in (tickers × bars) arrays together with
+# prefix sums of the return moments, so any window statistic (alpha, beta, tracking error)
+# is an O(1) lookup that is evaluated for every (Ticker, Filing Date) row at once.
+
+BETA_LOOKBACK_DAYS = 252
+RETURN_LOOKBACK_BDAYS = 2 * BETA_LOOKBACK_DAYS
+ALPHA_KEYS = ['Cumulative_Alpha', 'Rolling_Alpha_30', 'Beta',
+              'Jensen_Alpha', 'Tracking_Error', 'Information_Ratio']
+
+def plan_return_windows(df, lookback_bdays=RETURN_LOOKBACK_BDAYS):
+    """
+    Compute the [start, end) price window per ticker that covers both the technical-indicator
+    lookbacks and the point-in-time beta of every filing (which includes the filing day's bar).
+
+    Returns:
+        dict: {ticker: (start_date, end_date)}
+    """
+    filing_dates = pd.to_datetime(df['Filing Date'], dayfirst=True)
+    bounds = filing_dates.groupby(df['Ticker']).agg(['min', 'max'])
+    return {
+        ticker: ((first - pd.tseries.offsets.BDay(lookback_bdays)).normalize(), last.normalize() + pd.Timedelta(days=1))
+        for ticker, first, last in bounds.itertuples(name=None)
+    }
+
+def build_return_matrix(closes, benchmark_close):
+    """
+    Align every ticker's closes with the benchmark and build the shared return matrix.
+
+    Returns are taken bar to bar over the common dates, so the benchmark return of a row spans
+    the same interval as the stock return even when the stock skipped a session.
+
+    Args:
+        closes (dict): {ticker: pd.Series of closing prices}
+        benchmark_close (pd.Series): Benchmark closing prices.
+
+    Returns:
+        dict: 'tickers', per-ticker 'dates' arrays, 'lengths' and one (tickers × bars + 1)
+              prefix-sum array per return moment.
+    """
+    benchmark_close = benchmark_close.dropna().astype('float64')
+    tickers = list(closes)
+
+    joined = []
+    for ticker in tickers:
+        stock_close = closes[ticker].dropna().astype('float64')
+        stock_close = stock_close[stock_close.index.isin(benchmark_close.index)]
+        joined.append((stock_close.index.values, stock_close.to_numpy(), benchmark_close.reindex(stock_close.index).to_numpy()))
+
+    lengths = np.array([len(dates) for dates, _, _ in joined], dtype=int)
+    width = int(lengths.max()) if len(lengths) else 0
+
+    # Returns of bar i relative to bar i-1; index 0 (and the padding) has no return
+    sr = np.zeros((len(tickers), width))
+    br = np.zeros((len(tickers), width))
+    for i, (_, stock, benchmark) in enumerate(joined):
+        if lengths[i] > 1:
+            sr[i, 1:lengths[i]] = stock[1:] / stock[:-1] - 1
+            br[i, 1:lengths[i]] = benchmark[1:] / benchmark[:-1] - 1
+    excess = sr - br
+
+    def prefix(x):
+        return np.concatenate([np.zeros((x.shape[0], 1)), np.cumsum(x, axis=1)], axis=1)
+
+    return {
+        'tickers': tickers,
+        'dates': [dates for dates, _, _ in joined],
+        'lengths': lengths,
+        'sum_s': prefix(sr), 'sum_b': prefix(br), 'sum_x': prefix(excess),
+        'sum_bb': prefix(br * br), 'sum_sb': prefix(sr * br), 'sum_xx': prefix(excess * excess),
+    }
+
+def _matrix_rows(matrix, tickers):
+    """Matrix row of each ticker, or -1 when the ticker has no aligned prices."""
+    index = {ticker: i for i, ticker in enumerate(matrix['tickers'])}
+    return np.array([index.get(ticker, -1) for ticker in tickers], dtype=int)
+
+def _window_sums(matrix, rows, lo, hi):
+    """Sums of every return moment over bars [lo, hi) of each row."""
+    return {key[4:]: matrix[key][rows, hi] - matrix[key][rows, lo]
+            for key in ['sum_s', 'sum_b', 'sum_x', 'sum_bb', 'sum_sb', 'sum_xx']}
+
+def sample_alpha_metrics(matrix, tickers, windows):
+    """
+    Calculate alpha-related indicators for every [start, end) window at once.
+
+    Matches `calculate_alpha_indicators` on the window's aligned bars: windows with fewer
+    than 30 common bars get NaN, beta uses the sample covariance / variance.
+
+    Args:
+        tickers (list): Ticker of each window.
+        windows (list): (start_date, end_date) per window.
+
+    Returns:
+        pd.DataFrame: One row per window with Cumulative_Alpha, Rolling_Alpha_30, Beta,
+                      Jensen_Alpha, Tracking_Error and Information_Ratio.
+    """
+    rows = _matrix_rows(matrix, tickers)
+    first = np.zeros(len(windows), dtype=int)
+    stop = np.zeros(len(windows), dtype=int)
+    for k, (i, (start_date, end_date)) in enumerate(zip(rows, windows)):
+        if i < 0:
+            continue
+        dates = matrix['dates'][i]
+        first[k] = dates.searchsorted(start_date.normalize().to_datetime64(), side='left')
+        stop[k] = dates.searchsorted(end_date.normalize().to_datetime64(), side='left')
+
+    # Need at least 30 days to compute anything meaningful
+    enough = (rows >= 0) & (stop - first >= 30)
+    rows = np.where(enough, rows, 0)
+    lo = np.where(enough, first + 1, 0)  # returns inside the window start at the second bar
+    hi = np.where(enough, stop, 1)
+    n = (hi - lo).astype('float64')
+    sums = _window_sums(matrix, rows, lo, hi)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cumulative_alpha = sums['x']
+        rolling_alpha = np.where(n >= 30, (matrix['sum_x'][rows, hi] - matrix['sum_x'][rows, np.clip(hi - 30, 0, None)]) / 30, np.nan)
+
+        cov = (sums['sb'] - sums['s'] * sums['b'] / n) / (n - 1)
+        var = (sums['bb'] - sums['b'] * sums['b'] / n) / (n - 1)
+        beta = np.where((n > 1) & (var > 0), cov / var, np.nan)
+
+        rf = 0.01 / 252  # daily risk-free
+        jensen_alpha = (sums['s'] / n - (rf + beta * (sums['b'] / n - rf))) * 252
+
+        var_x = np.maximum((sums['xx'] - sums['x'] * sums['x'] / n) / (n - 1), 0.0)
+        tracking_error = np.where(n > 1, np.sqrt(var_x) * np.sqrt(252), np.nan)
+        information_ratio = np.where(tracking_error != 0, cumulative_alpha / tracking_error, np.nan)
+
+    metrics = pd.DataFrame({
+        'Cumulative_Alpha': cumulative_alpha,
+        'Rolling_Alpha_30': rolling_alpha,
+        'Beta': beta,
+        'Jensen_Alpha': jensen_alpha,
+        'Tracking_Error': tracking_error,
+        'Information_Ratio': information_ratio,
+    })
+    metrics.loc[~enough, ALPHA_KEYS] = np.nan
+    return metrics
+
+def sample_point_in_time_beta(matrix, tickers, filing_dates, lookback_days=BETA_LOOKBACK_DAYS):
+    """
+    Calculate the beta over the last `lookback_days` aligned bars up to each filing (inclusive).
+
+    Same estimator as `calculate_point_in_time_beta`: sample covariance over the population
+    variance of the benchmark returns; NaN without enough history or with a flat benchmark.
+
+    Returns:
+        np.ndarray: One beta per (ticker, filing date) pair.
+    """
+    rows = _matrix_rows(matrix, tickers)
+    last = np.full(len(rows), -1, dtype=int)
+    for k, (i, filing_date) in enumerate(zip(rows, filing_dates)):
+        if i >= 0:
+            last[k] = matrix['dates'][i].searchsorted(pd.Timestamp(filing_date).to_datetime64(), side='right') - 1
+
+    enough = (rows >= 0) & (last >= lookback_days - 1)
+    rows = np.where(enough, rows, 0)
+    hi = np.where(enough, last + 1, 1)
+    lo = np.where(enough, hi - (lookback_days - 1), 0)  # the first bar of the lookback has no return
+    n = float(lookback_days - 1)
+    sums = _window_sums(matrix, rows, lo, hi)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cov = (sums['sb'] - sums['s'] * sums['b'] / n) / (n - 1)
+        var = (sums['bb'] - sums['b'] * sums['b'] / n) / n
+        beta = np.where(var != 0, cov / var, np.nan)
+    return np.where(enough, beta, np.nan)
@@ -0,0 +1,68 @@
+import time
+from datetime import timedelta
+from concurrent.futures import FIRST_COMPLETED, wait
+
+from .executor_helpers import get_executor
+
+# Minimal DAG scheduler for the feature stages. Each stage is a callable that receives the
+# outputs of its dependencies as positional arguments; a stage is submitted as soon as all of
+# its dependencies are done, so independent stages (e.g. technical indicators and financial
+# ratios, which only share the cleaned filing table) run concurrently on the shared 'stage'
+# pool of `executor_helpers`. Stages must not run a stage graph themselves.
+
+def _check_graph(stages):
+    for name, (_, deps) in stages.items():
+        missing = [dep for dep in deps if dep not in stages]
+        if missing:
+            raise ValueError(f"Stage '{name}' depends on unknown stages {missing}")
+    order, visiting, done = [], set(), set()
+    def visit(name):
+        if name in done:
+            return
+        if name in visiting:
+            raise ValueError(f"Stage graph has a cycle through '{name}'")
+        visiting.add(name)
+        for dep in stages[name][1]:
+            visit(dep)
+        visiting.discard(name)
+        done.add(name)
+        order.append(name)
+    for name in stages:
+        visit(name)
+    return order
+
+def run_stage_graph(stages, max_workers=None):
+    """
+    Run a graph of stages, each one as soon as its dependencies have finished.
+
+    Args:
+        stages (dict): {name: (fn, [dependency names])}; `fn(*dependency_outputs)` returns the stage output.
+        max_workers (int): Maximum number of concurrently running stages (default: the size of the 'stage' pool).
+
+    Returns:
+        dict: {name: output} of every stage. The first failing stage's exception is re-raised
+              once the stages already running have finished; stages not started yet are skipped.
+    """
+    order = _check_graph(stages)
+    executor = get_executor('stage')
+    results, running, started = {}, {}, {}
+    while len(results) < len(stages):
+        for name in order:
+            fn, deps = stages[name]
+            if max_workers and len(running) >= max_workers:
+                break
+            if name in results or name in started or not all(dep in results for dep in deps):
+                continue
+            started[name] = time.time()
+            running[executor.submit(fn, *(results[dep] for dep in deps))] = name
+
+        finished, _ = wait(running, return_when=FIRST_COMPLETED)
+        for future in finished:
+            name = running.pop(future)
+            exc = future.exception()
+            if exc is not None:
+                wait(running)
+                raise exc
+            results[name] = future.result()
+            print(f"- Stage '{name}' finished in {timedelta(seconds=int(time.time() - started[name]))}")
+    return results
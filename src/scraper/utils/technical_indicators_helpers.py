@@ -1,21 +1,69 @@
-import ta
 import pandas as pd
-import yfinance as yf
 import contextlib
 import os
 import numpy as np
 
-def download_stock_data(ticker, filing_date, max_period=50, interval='1d', benchmark_ticker='SPY'):
-    """Download stock data for a given ticker over a specific period."""
+from .price_cache_helpers import get_price_history, get_price_windows, yahoo_download
+from .indicator_panel_helpers import build_price_panel, calculate_indicator_panel, sample_indicator_panel
+from .return_matrix_helpers import sample_alpha_metrics
+from .rate_limit_helpers import YAHOO_HOST, rate_limited_call
+
+# Business days of history every ticker's indicator series starts before its earliest filing
+# window, so the recursive smoothers (EMA, RSI, MACD, ADX, ATR) have converged by the first
+# sampled bar and all filings of a ticker can be read from one series
+INDICATOR_WARMUP_BDAYS = 200
+
+def get_indicator_window(filing_date, max_period=50):
+    """Return the (start, end) dates of the lookback window for a filing; it ends one business day before the filing."""
+    end_date = pd.to_datetime(filing_date, dayfirst=True) - pd.tseries.offsets.BDay(1)
+    start_date = end_date - pd.tseries.offsets.BDay(max_period+10)
+    return start_date, end_date
+
+def slice_window(data, start_date, end_date):
+    """Slice daily bars to [start_date, end_date) at date granularity."""
+    if data is None:
+        return None
+    return data.loc[(data.index >= start_date.normalize()) & (data.index < end_date.normalize())]
+
+def plan_price_windows(df, max_period=50, warmup_bdays=INDICATOR_WARMUP_BDAYS):
+    """
+    Group (Ticker, Filing Date) rows by ticker and compute the minimal date window that
+    covers every row's lookback: from `warmup_bdays` before the earliest filing's window
+    start to the latest filing's window end.
+
+    Returns:
+        dict: {ticker: (start_date, end_date)}
+    """
+    filing_dates = pd.to_datetime(df['Filing Date'], dayfirst=True)
+    bounds = filing_dates.groupby(df['Ticker']).agg(['min', 'max'])
+    return {
+        ticker: (get_indicator_window(first, max_period)[0] - pd.tseries.offsets.BDay(warmup_bdays),
+                 get_indicator_window(last, max_period)[1])
+        for ticker, first, last in bounds.itertuples(name=None)
+    }
+
+def download_stock_data(ticker, filing_date, max_period=50, interval='1d', benchmark_ticker='SPY', benchmark_data=None):
+    """
+    Load stock and benchmark data for a given ticker over a specific period, reading daily bars from the local price store.
+    If `benchmark_data` is given, the benchmark window is sliced from it instead of being fetched.
+    """
     with open(os.devnull, 'w') as fnull:
         with contextlib.redirect_stdout(fnull), contextlib.redirect_stderr(fnull):
             try:
-                end_date = pd.to_datetime(filing_date, dayfirst=True) - pd.tseries.offsets.BDay(1)
-                start_date = end_date - pd.tseries.offsets.BDay(max_period+10)
+                start_date, end_date = get_indicator_window(filing_date, max_period)
                 
-                stock_data = yf.download(ticker, start=start_date, end=end_date, interval=interval, progress=False)
-                benchmark_data = yf.download(benchmark_ticker, start=start_date, end=end_date, interval=interval, progress=False)
-                if stock_data.empty or benchmark_data.empty:
+                if interval == '1d':
+                    symbols = [ticker] if benchmark_data is not None else [ticker, benchmark_ticker]
+                    prices = get_price_history(symbols, start_date, end_date)
+                    stock_data = prices.get(ticker)
+                    if benchmark_data is not None:
+                        benchmark_data = slice_window(benchmark_data, start_date, end_date)
+                    else:
+                        benchmark_data = prices.get(benchmark_ticker)
+                else:
+                    prices, _ = rate_limited_call(YAHOO_HOST, yahoo_download, [ticker, benchmark_ticker], start=start_date, end=end_date, interval=interval)
+                    stock_data, benchmark_data = prices.get(ticker), prices.get(benchmark_ticker)
+                if stock_data is None or benchmark_data is None or stock_data.empty or benchmark_data.empty:
                     return None, None
                 return stock_data, benchmark_data
             except Exception as e:
@@ -51,16 +99,18 @@ def normalize_indicators(indicators, stock_data):
 
     return normalized_indicators
 
-def calculate_technical_indicators(row, stock_data):
+def calculate_indicator_series(stock_data):
     """
-    Calculate technical indicators using the `ta` Python library.
-    Assigns the most recent values to the row.
+    Calculate the full series of every technical indicator using the `ta` Python library.
+
+    Returns:
+        pd.DataFrame: One column per indicator, indexed like the NA-free bars of `stock_data`.
     """
+    # Only this per-row reference path needs `ta`; the batched pipeline uses the NumPy panel
+    import ta
 
     # 1) Drop NA rows early
     stock_data = stock_data.dropna()
-    if len(stock_data) < 50:
-        return row  # not enough data
 
     # 2) Utility to coerce any column into a 1-D Series
     def ensure_1d_series(col):
@@ -81,57 +131,68 @@ def calculate_technical_indicators(row, stock_data):
     high   = ensure_1d_series(stock_data['High'])
     low    = ensure_1d_series(stock_data['Low'])
     volume = ensure_1d_series(stock_data['Volume'])
-    open_  = ensure_1d_series(stock_data['Open'])
 
-    indicators = {}
+    indicators = pd.DataFrame(index=stock_data.index)
 
     # --- Moving Averages ---
-    indicators['SMA_10'] = close.rolling(10).mean().iloc[-1]
-    indicators['SMA_50'] = close.rolling(50).mean().iloc[-1]
-    indicators['EMA_10'] = close.ewm(span=10).mean().iloc[-1]
-    indicators['EMA_50'] = close.ewm(span=50).mean().iloc[-1]
+    indicators['SMA_10'] = close.rolling(10).mean()
+    indicators['SMA_50'] = close.rolling(50).mean()
+    indicators['EMA_10'] = close.ewm(span=10).mean()
+    indicators['EMA_50'] = close.ewm(span=50).mean()
 
     # --- Momentum Indicators ---
     rsi = ta.momentum.RSIIndicator(close=close, window=14)
-    indicators['RSI_14'] = rsi.rsi().iloc[-1]
+    indicators['RSI_14'] = rsi.rsi()
 
     macd = ta.trend.MACD(close=close)
-    indicators['MACD']        = macd.macd().iloc[-1]
-    indicators['MACD_Signal'] = macd.macd_signal().iloc[-1]
-    indicators['MACD_Hist']   = macd.macd_diff().iloc[-1]
+    indicators['MACD']        = macd.macd()
+    indicators['MACD_Signal'] = macd.macd_signal()
+    indicators['MACD_Hist']   = macd.macd_diff()
 
     adx = ta.trend.ADXIndicator(high=high, low=low, close=close, window=14)
-    indicators['ADX_14'] = adx.adx().iloc[-1]
+    indicators['ADX_14'] = adx.adx()
 
     cci = ta.trend.CCIIndicator(high=high, low=low, close=close, window=14)
-    indicators['CCI_14'] = cci.cci().iloc[-1]
+    indicators['CCI_14'] = cci.cci()
 
     roc = ta.momentum.ROCIndicator(close=close, window=10)
-    indicators['ROC'] = roc.roc().iloc[-1]
+    indicators['ROC'] = roc.roc()
 
     mfi = ta.volume.MFIIndicator(high=high, low=low, close=close, volume=volume, window=14)
-    indicators['MFI_14'] = mfi.money_flow_index().iloc[-1]
+    indicators['MFI_14'] = mfi.money_flow_index()
 
     willr = ta.momentum.WilliamsRIndicator(high=high, low=low, close=close, lbp=14)
-    indicators['WILLR_14'] = willr.williams_r().iloc[-1]
+    indicators['WILLR_14'] = willr.williams_r()
 
     stoch = ta.momentum.StochasticOscillator(high=high, low=low, close=close)
-    indicators['STOCH_K'] = stoch.stoch().iloc[-1]
-    indicators['STOCH_D'] = stoch.stoch_signal().iloc[-1]
+    indicators['STOCH_K'] = stoch.stoch()
+    indicators['STOCH_D'] = stoch.stoch_signal()
 
     # --- Volatility Indicators ---
     atr = ta.volatility.AverageTrueRange(high=high, low=low, close=close, window=14)
-    indicators['ATR_14'] = atr.average_true_range().iloc[-1]
+    indicators['ATR_14'] = atr.average_true_range()
 
     bb = ta.volatility.BollingerBands(close=close, window=20, window_dev=2)
-    indicators['Bollinger_Upper'] = bb.bollinger_hband().iloc[-1]
-    indicators['Bollinger_Lower'] = bb.bollinger_lband().iloc[-1]
+    indicators['Bollinger_Upper'] = bb.bollinger_hband()
+    indicators['Bollinger_Lower'] = bb.bollinger_lband()
 
     # --- Volume Indicators ---
     obv = ta.volume.OnBalanceVolumeIndicator(close=close, volume=volume)
-    indicators['OBV'] = obv.on_balance_volume().iloc[-1]
+    indicators['OBV'] = obv.on_balance_volume()
+
+    return indicators
 
-    # 4) Write back into the row dict
+def calculate_technical_indicators(row, stock_data):
+    """
+    Calculate technical indicators using the `ta` Python library.
+    Assigns the most recent values to the row.
+    """
+    if len(stock_data.dropna()) < 50:
+        return row  # not enough data
+
+    indicators = calculate_indicator_series(stock_data).iloc[-1].to_dict()
+
+    # Write back into the row dict
     for key, val in indicators.items():
         row[key] = val
 
@@ -207,13 +268,15 @@ def calculate_alpha_indicators(stock_data, benchmark_data):
 
     return indicators
 
-def process_ticker_technical_indicators(row):
-    """Process each ticker by downloading the stock data, benchmark data, and calculating indicators."""
+def process_ticker_technical_indicators(row, benchmark_data=None):
+    """
+    Process each ticker by loading the stock data, benchmark data, and calculating indicators.
+    If `benchmark_data` is given, the benchmark window is sliced from it instead of being fetched.
+    """
     ticker = row['Ticker']
     filing_date = row['Filing Date']
     
-    # Download stock and benchmark data
-    stock_data, benchmark_data = download_stock_data(ticker, filing_date, max_period=50, interval='1d', benchmark_ticker='SPY')
+    stock_data, benchmark_data = download_stock_data(ticker, filing_date, max_period=50, interval='1d', benchmark_ticker='SPY', benchmark_data=benchmark_data)
     
     if stock_data is None or benchmark_data is None:
         return None
@@ -227,4 +290,45 @@ def process_ticker_technical_indicators(row):
     for key, value in indicators.items():
         row[key] = value
 
-    return row
\ No newline at end of file
+    return row
+
+def add_panel_indicators(df, prices, return_matrix, max_period=50):
+    """
+    Calculate technical and alpha indicators for every (Ticker, Filing Date) row at once.
+
+    Each ticker's full indicator series is computed once, for all tickers in a single
+    vectorized panel pass, and sampled at the last bar of every filing's window with a
+    searchsorted lookup; a row still needs `max_period` bars inside its own window.
+    Alpha metrics are read from the run's shared stock-vs-SPY return matrix.
+
+    Every series starts `INDICATOR_WARMUP_BDAYS` before the ticker's earliest window (see
+    `plan_price_windows`). Rolling indicators and OBV (re-based to the window start) equal the
+    per-row `calculate_indicator_series` values on the window itself. The recursive smoothers
+    (EMA, RSI, MACD, ADX, ATR) instead carry the warm-up: every filing matches
+    `calculate_indicator_series` on its window extended by the warm-up to within 1e-4
+    relative, since the smoothers' start values have decayed over at least 200 bars.
+
+    Args:
+        df (pd.DataFrame): Rows with 'Ticker' and 'Filing Date'.
+        prices (dict): {ticker: adjusted OHLCV DataFrame} covering each ticker's windows.
+        return_matrix (dict): Return matrix from `build_return_matrix`.
+
+    Returns:
+        pd.DataFrame: The rows of tickers with price data, with the indicator columns added.
+    """
+    df = df[df['Ticker'].isin(list(prices))]
+    if df.empty:
+        return df.copy()
+
+    series_windows = plan_price_windows(df, max_period)
+    panel = build_price_panel({ticker: slice_window(prices[ticker], *series_windows[ticker]) for ticker in series_windows})
+    ticker_index = df['Ticker'].map({ticker: i for i, ticker in enumerate(panel['tickers'])}).to_numpy()
+    windows = [get_indicator_window(filing_date, max_period) for filing_date in df['Filing Date']]
+
+    indicators = calculate_indicator_panel(panel)
+    technical = sample_indicator_panel(panel, indicators, ticker_index, windows, min_bars=max_period)
+    alpha = sample_alpha_metrics(return_matrix, df['Ticker'].tolist(), windows)
+
+    technical.index = df.index
+    alpha.index = df.index
+    return pd.concat([df, technical, alpha], axis=1)
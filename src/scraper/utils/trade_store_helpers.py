@@ -0,0 +1,140 @@
+import os
+import sqlite3
+import contextlib
+import pandas as pd
+
+# Local store of raw openinsider rows. Rows are keyed by filing identity so overlapping scrapes
+# dedupe on insert, and every completed screener span is recorded so it is never fetched twice.
+TRADE_STORE_PATH = os.path.join(os.path.dirname(__file__), '../../../data/cache/insider_trades.sqlite')
+
+# Screener column → store column
+TRADE_COLUMNS = {
+    'Filing Date': 'filing_ts',
+    'Trade Date': 'trade_date',
+    'Ticker': 'ticker',
+    'Insider Name': 'insider',
+    'Title': 'title',
+    'Trade Type': 'trade_type',
+    'Price': 'price',
+    'Qty': 'qty',
+    'Owned': 'owned',
+    'ΔOwn': 'delta_own',
+    'Value': 'value',
+}
+TRADE_KEY = ['ticker', 'insider', 'trade_date', 'filing_ts']
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS trades (
+    filing_ts TEXT NOT NULL,
+    trade_date TEXT NOT NULL,
+    ticker TEXT NOT NULL,
+    insider TEXT NOT NULL,
+    title TEXT,
+    trade_type TEXT,
+    price REAL,
+    qty REAL,
+    owned REAL,
+    delta_own REAL,
+    value REAL,
+    PRIMARY KEY (ticker, insider, trade_date, filing_ts)
+);
+CREATE INDEX IF NOT EXISTS trades_filing_ts ON trades (filing_ts);
+CREATE TABLE IF NOT EXISTS fetched_windows (
+    span_start TEXT PRIMARY KEY,
+    span_end TEXT NOT NULL,
+    fetched_at TEXT NOT NULL
+);
+"""
+
+def open_trade_store(path=TRADE_STORE_PATH):
+    """Open (and create if needed) the SQLite trade store."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.executescript(_SCHEMA)
+    return conn
+
+def _span_key(date):
+    return pd.Timestamp(date).strftime('%Y-%m-%d')
+
+def get_fetched_spans(conn, spans):
+    """Return the subset of (start, end) spans whose rows are already complete in the store."""
+    fetched = {row[0] for row in conn.execute('SELECT span_start FROM fetched_windows')}
+    return [span for span in spans if _span_key(span[0]) in fetched]
+
+def get_high_water_mark(conn):
+    """Last calendar day covered by a completed span, or None for an empty store."""
+    row = conn.execute('SELECT MAX(span_end) FROM fetched_windows').fetchone()
+    return pd.Timestamp(row[0]) if row and row[0] else None
+
+def mark_spans_fetched(conn, spans):
+    """Record spans as complete; spans that reach today or later may still grow and are skipped."""
+    today = pd.Timestamp.today().normalize()
+    now = pd.Timestamp.now().isoformat(timespec='seconds')
+    final = [(_span_key(start), _span_key(end), now) for start, end in spans if pd.Timestamp(end).normalize() < today]
+    with conn:
+        conn.executemany('INSERT OR REPLACE INTO fetched_windows VALUES (?, ?, ?)', final)
+
+def _to_records(df):
+    """Convert screener rows to store columns with ISO date strings."""
+    records = df[[col for col in TRADE_COLUMNS if col in df.columns]].rename(columns=TRADE_COLUMNS)
+    for col in TRADE_COLUMNS.values():
+        if col not in records.columns:
+            records[col] = None
+    records['filing_ts'] = pd.to_datetime(records['filing_ts']).dt.strftime('%Y-%m-%d %H:%M:%S')
+    records['trade_date'] = pd.to_datetime(records['trade_date']).dt.strftime('%Y-%m-%d')
+    records['insider'] = records['insider'].fillna('')
+    records = records.dropna(subset=['filing_ts', 'trade_date', 'ticker'])
+    return records[list(TRADE_COLUMNS.values())].drop_duplicates(subset=TRADE_KEY)
+
+def _from_records(records):
+    """Convert store rows back to the screener layout used by `FeatureScraper.clean_table`."""
+    df = records.rename(columns={v: k for k, v in TRADE_COLUMNS.items()})
+    df['Filing Date'] = pd.to_datetime(df['Filing Date'])
+    df['Trade Date'] = pd.to_datetime(df['Trade Date'])
+    return df
+
+def upsert_trades(conn, df):
+    """
+    Insert screener rows that are not in the store yet.
+
+    Returns:
+        pd.DataFrame: The rows (screener layout) that were new to the store.
+    """
+    if df is None or df.empty:
+        return pd.DataFrame()
+    records = _to_records(df)
+    if records.empty:
+        return pd.DataFrame()
+
+    existing = pd.read_sql_query(
+        'SELECT ticker, insider, trade_date, filing_ts FROM trades WHERE filing_ts BETWEEN ? AND ?',
+        conn, params=(records['filing_ts'].min(), records['filing_ts'].max()))
+    merged = records.merge(existing, on=TRADE_KEY, how='left', indicator=True)
+    new_records = merged.loc[merged['_merge'] == 'left_only', records.columns]
+
+    placeholders = ', '.join('?' * len(records.columns))
+    with conn:
+        conn.executemany(f'INSERT OR IGNORE INTO trades ({", ".join(records.columns)}) VALUES ({placeholders})',
+                         new_records.astype(object).where(new_records.notna(), None).itertuples(index=False, name=None))
+    return _from_records(new_records.reset_index(drop=True))
+
+def load_trades(conn, spans):
+    """Load the stored rows whose filing timestamp falls inside any of the (start, end) spans."""
+    frames = []
+    for start, end in spans:
+        frames.append(pd.read_sql_query(
+            f'SELECT {", ".join(TRADE_COLUMNS.values())} FROM trades WHERE filing_ts >= ? AND filing_ts < ?',
+            conn, params=(_span_key(start), _span_key(pd.Timestamp(end) + pd.Timedelta(days=1)))))
+    frames = [frame for frame in frames if not frame.empty]
+    if not frames:
+        return pd.DataFrame()
+    # Overlapping spans must not return a row twice
+    return _from_records(pd.concat(frames, ignore_index=True).drop_duplicates(subset=TRADE_KEY, ignore_index=True))
+
+@contextlib.contextmanager
+def trade_store(path=TRADE_STORE_PATH):
+    conn = open_trade_store(path)
+    try:
+        yield conn
+    finally:
+        conn.close()
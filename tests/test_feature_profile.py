@@ -0,0 +1,21 @@
+import numpy as np
+
+from src.scraper.utils.feature_profile_helpers import KLLSketch
+
+def test_small_inputs_are_exact():
+    values = np.random.default_rng(0).normal(size=150)
+    sketch = KLLSketch()
+    sketch.update(values)
+    np.testing.assert_allclose(sketch.quantiles([0.1, 0.5, 0.9]), np.quantile(values, [0.1, 0.5, 0.9]))
+
+def test_compaction_offsets_do_not_bias_the_median():
+    # Every default sketch draws its own compaction offsets, so the rank errors average out
+    errors = []
+    for i in range(200):
+        values = np.random.default_rng(1000 + i).random(3000)
+        sketch = KLLSketch()
+        for chunk in np.array_split(values, 10):
+            sketch.update(chunk)
+        errors.append((values <= sketch.quantiles([0.5])[0]).mean() - 0.5)
+    assert abs(np.mean(errors)) < 0.001
+    assert np.max(np.abs(errors)) < 1.7 / 200 * 2
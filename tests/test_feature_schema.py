@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+
+from src.scraper.utils.feature_schema_helpers import apply_feature_schema
+from src.scraper.utils.feature_preprocess_helpers import engineer_new_features
+
+def make_features():
+    return pd.DataFrame({
+        'Ticker': ['AAA', 'BBB'], 'CEO': [1, 0], 'CFO': [0, 1], 'Pres': [0, 0], 'Dir': [1, 1],
+        'Value': [1_234_567.89, 98_765.43], 'Market_Cap': [2_345_678_901.23, 123_456_789.01],
+        '52_Week_High_Normalized': [0.9, 1.1], 'RSI_14': [55.5, 40.25],
+    })
+
+def test_wide_columns_keep_float64_until_engineered():
+    df = apply_feature_schema(make_features())
+    assert df['Value'].dtype == 'float64' and df['Market_Cap'].dtype == 'float64'
+    assert df['RSI_14'].dtype == 'float32' and df['CEO'].dtype == 'int8'
+    assert apply_feature_schema(df, engineered=True)['Value'].dtype == 'float32'
+
+def test_value_to_market_cap_is_computed_at_full_precision():
+    raw = make_features()
+    engineered = engineer_new_features(apply_feature_schema(raw))
+    expected = raw['Value'] / (raw['Market_Cap'] + 1e-6)
+    np.testing.assert_allclose(engineered['Value_to_MarketCap'], expected, rtol=1e-15)
+
+def test_non_string_column_labels():
+    assert apply_feature_schema(pd.DataFrame({0: [1.5], 1: [True]})).dtypes.tolist() == [np.dtype('float32'), np.dtype('int8')]
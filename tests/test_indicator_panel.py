@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.scraper.utils.indicator_panel_helpers import build_price_panel, calculate_indicator_panel, sample_indicator_panel
+from src.scraper.utils.return_matrix_helpers import build_return_matrix
+from src.scraper.utils.technical_indicators_helpers import INDICATOR_WARMUP_BDAYS, add_panel_indicators, calculate_indicator_series, get_indicator_window, slice_window
+
+INDICATORS = ['SMA_10', 'SMA_50', 'EMA_10', 'EMA_50', 'RSI_14', 'MACD', 'MACD_Signal', 'MACD_Hist',
+              'ADX_14', 'CCI_14', 'ROC', 'MFI_14', 'WILLR_14', 'STOCH_K', 'STOCH_D', 'ATR_14',
+              'Bollinger_Upper', 'Bollinger_Lower', 'OBV']
+
+def make_ohlcv(seed, n_days, nan_fraction=0.0, start='2023-01-02'):
+    """Synthetic daily bars; a fraction of the bars is blanked out to NaN."""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(start, periods=n_days)
+    close = 50 * np.exp(np.cumsum(rng.normal(0, 0.02, n_days)))
+    open_ = close * (1 + rng.normal(0, 0.005, n_days))
+    bars = pd.DataFrame({
+        'Open': open_,
+        'High': np.maximum(open_, close) * (1 + rng.random(n_days) * 0.01),
+        'Low': np.minimum(open_, close) * (1 - rng.random(n_days) * 0.01),
+        'Close': close,
+        'Volume': rng.integers(100_000, 1_000_000, n_days).astype(float),
+    }, index=dates)
+    if nan_fraction:
+        bars.loc[rng.random(n_days) < nan_fraction, :] = np.nan
+    return bars
+
+def reference_row(bars):
+    """Last row of the `ta`-based indicator series, or all-NaN with fewer than 50 bars (like calculate_technical_indicators)."""
+    if len(bars.dropna()) < 50:
+        return pd.Series(np.nan, index=INDICATORS)
+    return calculate_indicator_series(bars).iloc[-1][INDICATORS]
+
+def panel_rows(prices, windows):
+    """Sample the NumPy panel at each (ticker, start, end) window."""
+    panel = build_price_panel(prices)
+    index = {ticker: i for i, ticker in enumerate(panel['tickers'])}
+    indicators = calculate_indicator_panel(panel)
+    samples = sample_indicator_panel(
+        panel, indicators,
+        [index[ticker] for ticker, _, _ in windows],
+        [(start, end) for _, start, end in windows],
+    )
+    return samples[INDICATORS]
+
+@pytest.mark.parametrize('nan_fraction', [0.0, 0.05])
+def test_panel_matches_ta_on_full_windows(nan_fraction):
+    prices = {f"T{i}": make_ohlcv(i, 60 + 15 * i, nan_fraction) for i in range(5)}
+    windows = [(ticker, bars.index[0], bars.index[-1] + pd.Timedelta(days=1)) for ticker, bars in prices.items()]
+
+    actual = panel_rows(prices, windows)
+    expected = pd.DataFrame([reference_row(prices[ticker]) for ticker, _, _ in windows])
+
+    np.testing.assert_allclose(actual.to_numpy(), expected.to_numpy(), rtol=1e-9, atol=1e-9, equal_nan=True)
+
+def test_short_windows_are_nan():
+    prices = {'SHORT': make_ohlcv(7, 40), 'LONG': make_ohlcv(8, 120)}
+    windows = [(ticker, bars.index[0], bars.index[-1] + pd.Timedelta(days=1)) for ticker, bars in prices.items()]
+
+    actual = panel_rows(prices, windows)
+
+    assert actual.iloc[0].isna().all()
+    assert reference_row(prices['SHORT']).isna().all()
+    np.testing.assert_allclose(actual.iloc[1].to_numpy(), reference_row(prices['LONG']).to_numpy(), rtol=1e-9, atol=1e-9, equal_nan=True)
+
+def test_obv_is_rebased_to_the_window_start():
+    bars = make_ohlcv(3, 150)
+    start, end = bars.index[60], bars.index[130]
+
+    actual = panel_rows({'T': bars}, [('T', start, end)])
+    expected = reference_row(bars.loc[(bars.index >= start) & (bars.index < end)])
+
+    assert actual['OBV'].iloc[0] == pytest.approx(expected['OBV'])
+
+def test_add_panel_indicators_samples_one_series_per_ticker():
+    bars = make_ohlcv(5, 900, nan_fraction=0.03)
+    filings = pd.DataFrame({'Ticker': ['T', 'T', 'T', 'U'], 'Filing Date': [bars.index[i] for i in (300, 301, 880, 880)]})
+    prices = {'T': bars, 'U': make_ohlcv(6, 900)}
+    return_matrix = build_return_matrix({ticker: frame['Close'] for ticker, frame in prices.items()}, bars['Close'])
+
+    actual = add_panel_indicators(filings, prices, return_matrix)[INDICATORS]
+    warmup = pd.tseries.offsets.BDay(INDICATOR_WARMUP_BDAYS)
+    for (ticker, filing_date), (_, row) in zip(filings.itertuples(index=False), actual.iterrows()):
+        start, end = get_indicator_window(filing_date)
+        # Recursive smoothers match the reference on the window extended by the warm-up, whatever
+        # longer history the ticker's series carries for its later filings
+        expected = reference_row(slice_window(prices[ticker], start - warmup, end))
+        np.testing.assert_allclose(row.drop('OBV').to_numpy(), expected.drop('OBV').to_numpy(), rtol=1e-4, atol=1e-6)
+        # OBV is re-based to the filing's own window
+        assert row['OBV'] == pytest.approx(reference_row(slice_window(prices[ticker], start, end))['OBV'])
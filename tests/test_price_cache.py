@@ -0,0 +1,35 @@
+import pandas as pd
+
+from src.scraper.utils import price_cache_helpers
+from src.scraper.utils.negative_cache_helpers import NegativeCache
+from src.scraper.utils.price_cache_helpers import ACTION_COLUMNS, RAW_COLUMNS, load_cached_prices, refresh_price_cache, save_cached_prices
+
+def make_bars(start, end):
+    """Flat raw daily bars on the business days of [start, end)."""
+    dates = pd.bdate_range(start, pd.Timestamp(end) - pd.Timedelta(days=1), name='Date')
+    bars = pd.DataFrame(10.0, index=dates, columns=RAW_COLUMNS)
+    bars[ACTION_COLUMNS] = 0.0
+    return bars
+
+def test_failed_tail_is_not_marked_as_covered(tmp_path, monkeypatch):
+    monkeypatch.setattr(price_cache_helpers, 'PRICE_CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(price_cache_helpers, 'get_negative_cache', lambda: NegativeCache(str(tmp_path / 'negative.json')))
+    save_cached_prices('AAA', make_bars('2024-03-01', '2024-06-01'), pd.Timestamp('2024-03-01'), pd.Timestamp('2024-06-01'))
+
+    calls = []
+    def download(tickers, start, end):
+        calls.append((start, end))
+        # The head comes back, the tail fails with a transient error
+        if end <= pd.Timestamp('2024-03-01'):
+            return {'AAA': make_bars(start, end)}, set()
+        return {}, {'AAA'}
+    monkeypatch.setattr(price_cache_helpers, 'download_price_data', download)
+
+    refresh_price_cache({'AAA': (pd.Timestamp('2024-01-02'), pd.Timestamp('2024-09-01'))})
+    prices, coverage_start, coverage_end = load_cached_prices('AAA')
+    assert (coverage_start, coverage_end) == (pd.Timestamp('2024-01-02'), pd.Timestamp('2024-06-01'))
+    assert prices.index.min() == pd.Timestamp('2024-01-02')
+
+    calls.clear()
+    refresh_price_cache({'AAA': (pd.Timestamp('2024-01-02'), pd.Timestamp('2024-09-01'))})
+    assert calls == [(pd.Timestamp('2024-06-01'), pd.Timestamp('2024-09-01'))]
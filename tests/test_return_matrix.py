@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.scraper.utils.return_matrix_helpers import ALPHA_KEYS, build_return_matrix, sample_alpha_metrics, sample_point_in_time_beta
+from src.scraper.utils.technical_indicators_helpers import calculate_alpha_indicators
+from src.scraper.utils.financial_ratios_helpers import calculate_point_in_time_beta
+
+DATES = pd.bdate_range('2021-01-04', periods=700)
+
+def make_closes(seed, beta=1.0, drop_fraction=0.0):
+    """Synthetic closes that co-move with the benchmark; a fraction of the sessions is dropped."""
+    rng = np.random.default_rng(seed)
+    benchmark_returns = np.random.default_rng(0).normal(0.0004, 0.01, len(DATES))
+    returns = beta * benchmark_returns + rng.normal(0, 0.015, len(DATES))
+    closes = pd.Series(30 * np.cumprod(1 + returns), index=DATES)
+    if drop_fraction:
+        closes = closes[rng.random(len(DATES)) >= drop_fraction]
+    return closes
+
+BENCHMARK = pd.Series(400 * np.cumprod(1 + np.random.default_rng(0).normal(0.0004, 0.01, len(DATES))), index=DATES)
+
+def aligned(closes, start, end):
+    """Stock and benchmark closes on their common dates inside [start, end)."""
+    closes = closes[(closes.index >= start) & (closes.index < end)]
+    closes = closes[closes.index.isin(BENCHMARK.index)]
+    return closes, BENCHMARK.reindex(closes.index)
+
+@pytest.mark.parametrize('drop_fraction', [0.0, 0.05])
+def test_alpha_metrics_match_calculate_alpha_indicators(drop_fraction):
+    closes = {f"T{i}": make_closes(i + 1, beta=0.5 + i / 2, drop_fraction=drop_fraction) for i in range(4)}
+    matrix = build_return_matrix(closes, BENCHMARK)
+    windows = [(ticker, DATES[start], DATES[start + length])
+               for ticker in closes for start, length in [(0, 60), (200, 45), (400, 250), (650, 20)]]
+
+    actual = sample_alpha_metrics(matrix, [ticker for ticker, _, _ in windows], [(start, end) for _, start, end in windows])
+
+    for k, (ticker, start, end) in enumerate(windows):
+        stock, benchmark = aligned(closes[ticker], start, end)
+        expected = calculate_alpha_indicators(stock.to_frame('Close'), benchmark.to_frame('Close'))
+        expected = np.array([np.nan if expected[key] is None else expected[key] for key in ALPHA_KEYS], dtype='float64')
+        np.testing.assert_allclose(actual.iloc[k][ALPHA_KEYS].to_numpy(dtype='float64'), expected, rtol=1e-8, atol=1e-12, equal_nan=True)
+
+def test_unknown_ticker_gets_nan_alpha():
+    matrix = build_return_matrix({'T0': make_closes(1)}, BENCHMARK)
+    actual = sample_alpha_metrics(matrix, ['MISSING'], [(DATES[0], DATES[100])])
+    assert actual.iloc[0].isna().all()
+
+def test_point_in_time_beta_matches_calculate_point_in_time_beta():
+    closes = {f"T{i}": make_closes(i + 1, beta=0.5 + i / 2) for i in range(4)}
+    matrix = build_return_matrix(closes, BENCHMARK)
+    pairs = [(ticker, DATES[day]) for ticker in closes for day in (100, 260, 400, 699)]
+
+    actual = sample_point_in_time_beta(matrix, [ticker for ticker, _ in pairs], [date for _, date in pairs])
+
+    for k, (ticker, filing_date) in enumerate(pairs):
+        # The raw, unaligned series up to the filing, as the per-row path passed them
+        expected = calculate_point_in_time_beta(closes[ticker].loc[:filing_date], BENCHMARK.loc[:filing_date])
+        np.testing.assert_allclose(actual[k], expected, rtol=1e-8, equal_nan=True)
+
+def test_point_in_time_beta_pairs_returns_over_common_sessions():
+    # A ticker missing sessions that SPY has: the per-row path took the last 252 closes of each
+    # series separately, so its stock returns spanned the gaps while the benchmark returns did not.
+    # The matrix takes both returns over the same common sessions instead.
+    closes = {f"T{i}": make_closes(i + 1, beta=0.5 + i / 2, drop_fraction=0.05) for i in range(4)}
+    matrix = build_return_matrix(closes, BENCHMARK)
+    pairs = [(ticker, DATES[day]) for ticker in closes for day in (400, 699)]
+
+    actual = sample_point_in_time_beta(matrix, [ticker for ticker, _ in pairs], [date for _, date in pairs])
+
+    for k, (ticker, filing_date) in enumerate(pairs):
+        raw = calculate_point_in_time_beta(closes[ticker].loc[:filing_date], BENCHMARK.loc[:filing_date])
+        stock, benchmark = aligned(closes[ticker], DATES[0], filing_date + pd.Timedelta(days=1))
+        assert not np.isclose(actual[k], raw, rtol=1e-6)
+        np.testing.assert_allclose(actual[k], calculate_point_in_time_beta(stock, benchmark), rtol=1e-8)
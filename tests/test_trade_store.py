@@ -0,0 +1,42 @@
+import pandas as pd
+
+from src.scraper.feature_scraper import FeatureScraper
+
+TODAY = pd.Timestamp.today().normalize()
+
+def screener_row(ticker, insider, filed, price=10.0):
+    """One raw openinsider row; `filed` is the filing time today, e.g. '10:05'."""
+    return {
+        'Filing Date': f"{TODAY.date()} {filed}:00",
+        'Trade Date': (TODAY - pd.Timedelta(days=2)).strftime('%Y-%m-%d'),
+        'Ticker': ticker, 'Insider Name': insider, 'Title': 'CEO', 'Trade Type': 'P - Purchase',
+        'Price': f'${price}', 'Qty': '+100', 'Owned': '1,000', 'ΔOwn': '+10%', 'Value': '+$1,000',
+    }
+
+def make_scraper(tmp_path, pages):
+    """A scraper on a fresh trade store whose screener returns the next entry of `pages` on every call."""
+    scraper = FeatureScraper()
+    scraper.trade_store_path = str(tmp_path / 'trades.sqlite')
+    scraper.process_web_page = lambda span: pd.DataFrame(pages.pop(0))
+    return scraper
+
+def test_first_scrape_matches_store_view(tmp_path):
+    # Today's span is never marked complete, so the second call scrapes it again
+    rows = [screener_row('AAA', 'Doe', '10:05'), screener_row('AAA', 'Doe', '10:05'), screener_row('BBB', 'Roe', '11:05')]
+    scraper = make_scraper(tmp_path, [rows, rows])
+    scraper.fetch_spans([(TODAY, TODAY)])
+    first = scraper.data
+    scraper.fetch_spans([(TODAY, TODAY)])
+    assert len(first) == 2
+    pd.testing.assert_frame_equal(first, scraper.data)
+
+def test_incremental_returns_whole_filing_groups(tmp_path):
+    old = [screener_row('AAA', 'Doe', '10:05'), screener_row('BBB', 'Roe', '11:05')]
+    # A second AAA purchase filed ten minutes later lands in the same (Ticker, Filing Date) group
+    new = old + [screener_row('AAA', 'Poe', '10:15', price=12.0)]
+    scraper = make_scraper(tmp_path, [old, new])
+    scraper.fetch_spans([(TODAY, TODAY)], incremental=True)
+    assert sorted(scraper.data['Ticker']) == ['AAA', 'BBB']
+    scraper.fetch_spans([(TODAY, TODAY)], incremental=True)
+    assert sorted(scraper.data['Insider Name']) == ['Doe', 'Poe']
+    assert set(scraper.data['Ticker']) == {'AAA'}